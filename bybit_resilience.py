@@ -0,0 +1,367 @@
+import random
+import threading
+import time
+
+import requests
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+# === Bybit Dayanıklılık Katmanı ===
+# Tüm Bybit çağrıları buradan geçer:
+# - Endpoint bazında timeout
+# - Sadece idempotent okuma çağrıları için jitter'lı retry (retry bütçesi ile sınırlı)
+# - Endpoint bazında circuit breaker: Bybit bozulduğunda beklemeden hata döner
+# - Breaker açıkken başarısız olan koruyucu işlemler (SL/TP) kuyruğa alınır ve sonra tekrar denenir
+
+# Endpoint politikaları: timeout (saniye), idempotent (retry yapılabilir mi), protective (başarısızsa kuyruğa al)
+ENDPOINT_POLICIES = {
+    "get_positions": {"timeout": 5, "idempotent": True, "protective": False},
+    "get_instruments_info": {"timeout": 10, "idempotent": True, "protective": False},
+    "get_tickers": {"timeout": 5, "idempotent": True, "protective": False},
+    "get_open_orders": {"timeout": 5, "idempotent": True, "protective": False},
+    "get_order_history": {"timeout": 5, "idempotent": True, "protective": False},
+    "place_order": {"timeout": 8, "idempotent": False, "protective": False},
+    "cancel_batch_order": {"timeout": 5, "idempotent": False, "protective": False},
+    "amend_batch_order": {"timeout": 5, "idempotent": False, "protective": False},
+    "set_trading_stop": {"timeout": 5, "idempotent": False, "protective": True},
+}
+DEFAULT_ENDPOINT_POLICY = {"timeout": 5, "idempotent": False, "protective": False}
+
+MAX_READ_RETRIES = 2  # Okuma çağrılarında ilk denemeden sonra en fazla 2 retry
+RETRY_BASE_DELAY = 0.2  # saniye
+RETRY_MAX_DELAY = 1.0  # saniye
+RETRY_BUDGET_RATIO = 0.2  # Her çağrı bütçeye 0.2 retry hakkı ekler (en fazla %20 ek yük)
+RETRY_BUDGET_MAX = 10.0
+
+BREAKER_FAILURE_THRESHOLD = 5  # Art arda bu kadar geçici hata olursa breaker açılır
+BREAKER_RESET_TIMEOUT = 30  # Açık breaker bu süre sonra tek bir deneme çağrısına izin verir (half-open)
+
+PROTECTIVE_QUEUE_MAX_AGE = 600  # 10 dakikadan eski koruyucu işlemler atılır
+
+# Geçici (exchange kaynaklı) kabul edilen Bybit retCode'ları
+TRANSIENT_RET_CODES = {10000, 10006, 10016, 10429}
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Breaker açıkken yapılan çağrılarda hemen fırlatılır.
+    """
+
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"Bybit {endpoint} devre kesici açık, {retry_after:.0f} sn sonra tekrar denenecek")
+
+
+def is_transient_error(error):
+    """
+    Hatanın Bybit/ağ kaynaklı geçici bir hata olup olmadığını belirler.
+    Parametre hataları (InvalidRequestError) breaker'ı etkilemez.
+    """
+    if isinstance(error, InvalidRequestError):
+        return error.status_code in TRANSIENT_RET_CODES
+    return isinstance(error, (FailedRequestError, requests.exceptions.RequestException, TimeoutError))
+
+
+class CircuitBreaker:
+    def __init__(self, endpoint, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0
+        self.trip_count = 0
+        self.last_trip_time = None
+        self.last_error = None
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self._half_open_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Çağrıya izin verilip verilmediğini kontrol eder, izin yoksa CircuitOpenError fırlatır.
+        """
+        with self._lock:
+            if self.state == STATE_OPEN:
+                retry_after = self.opened_at + self.reset_timeout - time.time()
+                if retry_after > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.endpoint, retry_after)
+                self.state = STATE_HALF_OPEN
+                _notify_state_change(self.endpoint, STATE_HALF_OPEN, self.last_error)
+
+            if self.state == STATE_HALF_OPEN:
+                # Half-open durumda aynı anda tek bir deneme çağrısı
+                if self._half_open_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.endpoint, self.reset_timeout)
+                self._half_open_in_flight = True
+
+            self.calls += 1
+
+    def record_success(self):
+        with self._lock:
+            previous_state = self.state
+            self.state = STATE_CLOSED
+            self.consecutive_failures = 0
+            self._half_open_in_flight = False
+        if previous_state != STATE_CLOSED:
+            _notify_state_change(self.endpoint, STATE_CLOSED, None)
+
+    def record_failure(self, error):
+        tripped = False
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)[:200]
+            self._half_open_in_flight = False
+            if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != STATE_OPEN:
+                    self.trip_count += 1
+                    self.last_trip_time = time.time()
+                    tripped = True
+                self.state = STATE_OPEN
+                self.opened_at = time.time()
+        if tripped:
+            _notify_state_change(self.endpoint, STATE_OPEN, self.last_error)
+
+    def release(self):
+        """
+        Breaker'ı etkilemeyen (parametre hatası gibi) sonuçlarda half-open kilidini bırakır.
+        """
+        with self._lock:
+            self._half_open_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "trip_count": self.trip_count,
+                "last_trip_time": self.last_trip_time,
+                "last_error": self.last_error,
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+            }
+
+
+class RetryBudget:
+    """
+    Token bucket: her çağrı bütçeye RETRY_BUDGET_RATIO kadar ekler, her retry 1 harcar.
+    Bybit bozulduğunda retry'lar yükü katlayamaz.
+    """
+
+    def __init__(self, ratio=RETRY_BUDGET_RATIO, max_tokens=RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_withdraw(self):
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.retries += 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def snapshot(self):
+        with self._lock:
+            return {"tokens": round(self.tokens, 2), "retries": self.retries, "exhausted": self.exhausted}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+_retry_budget = RetryBudget()
+_protective_queue = {}  # (endpoint, symbol, alanlar) -> (kwargs, kuyruğa alınma zamanı); en son istek kazanır
+_protective_lock = threading.Lock()
+_state_change_listener = None
+
+
+def set_state_change_listener(listener):
+    """
+    Breaker durum değişikliklerinde çağrılacak fonksiyonu ayarlar: listener(endpoint, state, last_error)
+    """
+    global _state_change_listener
+    _state_change_listener = listener
+
+
+def _notify_state_change(endpoint, state, last_error):
+    print(f"⚡ Bybit {endpoint} devre kesici durumu: {state} (son hata: {last_error})")
+    if _state_change_listener:
+        try:
+            _state_change_listener(endpoint, state, last_error)
+        except Exception as e:
+            print(f"❌ Devre kesici bildirim hatası: {e}")
+
+
+def get_breaker(endpoint):
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+    return breaker
+
+
+def _policy_for(endpoint):
+    return ENDPOINT_POLICIES.get(endpoint, DEFAULT_ENDPOINT_POLICY)
+
+
+def _protective_key(endpoint, kwargs):
+    fields = tuple(sorted(key for key in kwargs if key not in ("category", "symbol")))
+    return endpoint, kwargs.get("symbol"), fields
+
+
+def queue_protective_call(endpoint, kwargs):
+    with _protective_lock:
+        _protective_queue[_protective_key(endpoint, kwargs)] = (dict(kwargs), time.time())
+    print(f"📥 Koruyucu işlem kuyruğa alındı: {endpoint} {kwargs.get('symbol')}")
+
+
+def discard_protective_calls(open_symbols):
+    """
+    Artık açık pozisyonu olmayan sembollerin kuyruktaki koruyucu işlemlerini siler.
+    """
+    with _protective_lock:
+        for key in [key for key in _protective_queue if key[1] not in open_symbols]:
+            del _protective_queue[key]
+
+
+class ResilientSession:
+    """
+    pybit HTTP oturumunu saran vekil. session.get_positions(...) gibi tüm çağrılar
+    endpoint politikasına göre timeout, retry ve circuit breaker'dan geçer.
+
+    session_factory(timeout) -> HTTP benzeri oturum döndürmelidir. Retry'ı bu katman
+    yaptığı için oturum pybit'in kendi retry/uyku mekanizmasını kapatmış olmalıdır.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._sessions = {}  # timeout -> oturum (bağlantılar yeniden kullanılır)
+        self._sessions_lock = threading.Lock()
+
+    def _session_for(self, timeout):
+        session = self._sessions.get(timeout)
+        if session is None:
+            with self._sessions_lock:
+                session = self._sessions.get(timeout)
+                if session is None:
+                    session = self._session_factory(timeout)
+                    self._sessions[timeout] = session
+        return session
+
+    def __getattr__(self, endpoint):
+        if endpoint.startswith("_"):
+            raise AttributeError(endpoint)
+
+        def call(**kwargs):
+            return self.call(endpoint, **kwargs)
+
+        return call
+
+    def call(self, endpoint, **kwargs):
+        policy = _policy_for(endpoint)
+        breaker = get_breaker(endpoint)
+        session = self._session_for(policy["timeout"])
+        max_attempts = 1 + (MAX_READ_RETRIES if policy["idempotent"] else 0)
+        deadline = time.time() + policy["timeout"] * max_attempts
+
+        _retry_budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                if policy["protective"]:
+                    queue_protective_call(endpoint, kwargs)
+                raise
+
+            try:
+                response = getattr(session, endpoint)(**kwargs)
+            except Exception as e:
+                if not is_transient_error(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure(e)
+
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (attempt - 1))) * random.uniform(0.5, 1.0)
+                can_retry = (
+                    attempt < max_attempts
+                    and time.time() + delay < deadline
+                    and breaker.state == STATE_CLOSED
+                    and _retry_budget.try_withdraw()
+                )
+                if can_retry:
+                    print(f"🔁 Bybit {endpoint} geçici hata, {delay:.2f} sn sonra tekrar deneniyor ({attempt}/{max_attempts - 1}): {e}")
+                    time.sleep(delay)
+                    continue
+
+                if policy["protective"]:
+                    queue_protective_call(endpoint, kwargs)
+                raise
+
+            breaker.record_success()
+            if policy["protective"]:
+                # Doğrudan başarılı olan yeni istek, kuyruktaki eski isteği geçersiz kılar
+                with _protective_lock:
+                    _protective_queue.pop(_protective_key(endpoint, kwargs), None)
+            return response
+
+    def drain_protective_queue(self):
+        """
+        Kuyruktaki koruyucu işlemleri breaker izin verdiği ölçüde tekrar dener.
+        Başarısız olanlar call() tarafından tekrar kuyruğa alınır.
+        """
+        with _protective_lock:
+            items = list(_protective_queue.items())
+            _protective_queue.clear()
+
+        sent = 0
+        now = time.time()
+        for index, ((endpoint, symbol, _), (kwargs, queued_at)) in enumerate(items):
+            if now - queued_at > PROTECTIVE_QUEUE_MAX_AGE:
+                print(f"🗑️ Süresi dolan koruyucu işlem atıldı: {endpoint} {symbol}")
+                continue
+            try:
+                self.call(endpoint, **kwargs)
+                sent += 1
+            except CircuitOpenError:
+                # Breaker hâlâ açık: kalanları geri koy ve bekle
+                with _protective_lock:
+                    for remaining_key, remaining_value in items[index + 1:]:
+                        _protective_queue.setdefault(remaining_key, remaining_value)
+                break
+            except Exception as e:
+                print(f"❌ Kuyruktaki koruyucu işlem başarısız ({endpoint} {symbol}): {e}")
+        return sent
+
+
+def resilience_snapshot():
+    """
+    Breaker durumları, trip sayıları, retry bütçesi ve koruyucu kuyruk boyutu.
+    """
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    with _protective_lock:
+        queued = [f"{endpoint}:{symbol}" for endpoint, symbol, _ in _protective_queue]
+    return {
+        "breakers": {endpoint: breaker.snapshot() for endpoint, breaker in breakers.items()},
+        "retry_budget": _retry_budget.snapshot(),
+        "protective_queue": queued,
+    }
@@ -0,0 +1,594 @@
+import decimal
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from pybit.exceptions import FailedRequestError, InvalidRequestError
+
+# === Yerel Bybit v5 Simülatörü ===
+# Botun kullandığı Bybit v5 endpoint'lerini ağ olmadan, aynı süreç içinde taklit eder:
+# - Market ve Limit emirler için eşleştirme motoru (one-way mod, pozisyon netleştirme)
+# - Pozisyon takibi ve senaryolu fiyat akışıyla tetiklenen SL/TP (trading stop)
+# - Endpoint bazında ayarlanabilir gecikme ve hata profilleri (seed ile tekrarlanabilir)
+# BYBIT_SIMULATOR_MODE=true ile seçilir, BYBIT_SIMULATOR_CONFIG ile JSON konfigürasyon verilebilir.
+
+DEFAULT_INSTRUMENTS = [
+    {"symbol": "BTCUSDT", "tickSize": "0.10", "qtyStep": "0.001", "minOrderQty": "0.001", "maxOrderQty": "500", "minNotionalValue": "5", "price": 60000.0},
+    {"symbol": "ETHUSDT", "tickSize": "0.01", "qtyStep": "0.01", "minOrderQty": "0.01", "maxOrderQty": "7000", "minNotionalValue": "5", "price": 3000.0},
+    {"symbol": "SOLUSDT", "tickSize": "0.010", "qtyStep": "0.1", "minOrderQty": "0.1", "maxOrderQty": "80000", "minNotionalValue": "5", "price": 150.0},
+    {"symbol": "XRPUSDT", "tickSize": "0.0001", "qtyStep": "1", "minOrderQty": "1", "maxOrderQty": "1500000", "minNotionalValue": "5", "price": 0.6},
+    {"symbol": "1000PEPEUSDT", "tickSize": "0.0000001", "qtyStep": "100", "minOrderQty": "100", "maxOrderQty": "50000000", "minNotionalValue": "5", "price": 0.012},
+]
+
+DEFAULT_LATENCY_PROFILE = {"default": {"mean_ms": 0, "jitter_ms": 0}}
+DEFAULT_ERROR_PROFILE = {}  # endpoint -> {"rate": 0.05, "kind": "failed" | "rate_limit" | "timeout"}
+DEFAULT_FEED_VOLATILITY = 0.001  # Senaryo verilmeyen semboller için adım başına %0.1 random walk
+DEFAULT_FEED_INTERVAL = 1.0  # saniye
+
+
+def _ok(result):
+    return {"retCode": 0, "retMsg": "OK", "result": result, "retExtInfo": {}, "time": int(time.time() * 1000)}
+
+
+def _invalid(endpoint, message, code=10001):
+    return InvalidRequestError(
+        request=f"SIM {endpoint}",
+        message=message,
+        status_code=code,
+        time=time.strftime("%H:%M:%S"),
+        resp_headers=None,
+    )
+
+
+def _quantize(value, step):
+    step_decimal = decimal.Decimal(str(step))
+    return (decimal.Decimal(str(value)) / step_decimal).quantize(decimal.Decimal('1'), rounding=decimal.ROUND_HALF_UP) * step_decimal
+
+
+def _is_multiple(value, step):
+    return _quantize(value, step) == decimal.Decimal(str(value))
+
+
+class PriceFeed:
+    """
+    Senaryolu fiyat akışı. Senaryosu olan semboller listedeki fiyatları sırayla izler
+    (liste bitince son fiyatta kalır, loop=True ise başa döner); diğerleri seed'li random walk yapar.
+    """
+
+    def __init__(self, initial_prices, script=None, seed=42, volatility=DEFAULT_FEED_VOLATILITY, loop=False):
+        self.prices = dict(initial_prices)
+        self.script = {symbol: list(values) for symbol, values in (script or {}).items() if values}
+        self.volatility = volatility
+        self.loop = loop
+        self.step_count = 0
+        self._rng = random.Random(seed)
+
+        for symbol, values in self.script.items():
+            self.prices[symbol] = float(values[0])
+
+    def step(self):
+        self.step_count += 1
+        for symbol in list(self.prices):
+            values = self.script.get(symbol)
+            if values:
+                index = self.step_count % len(values) if self.loop else min(self.step_count, len(values) - 1)
+                self.prices[symbol] = float(values[index])
+            elif self.volatility > 0:
+                self.prices[symbol] *= 1 + self._rng.uniform(-self.volatility, self.volatility)
+        return dict(self.prices)
+
+
+class BybitSimulator:
+    """
+    Bybit v5 linear endpoint'lerinin bellek içi eşleştirme motoru.
+    Metot adları ve parametreleri pybit HTTP ile aynıdır; gecikme/hata eklemez (bkz. SimulatedHTTP).
+    """
+
+    def __init__(self, instruments=None, price_script=None, seed=42, feed_volatility=DEFAULT_FEED_VOLATILITY,
+                 feed_loop=False, latency_profile=None, error_profile=None):
+        instruments = instruments or DEFAULT_INSTRUMENTS
+        self.instruments = {}
+        initial_prices = {}
+        for spec in instruments:
+            symbol = spec["symbol"]
+            self.instruments[symbol] = spec
+            initial_prices[symbol] = float(spec.get("price", 1.0))
+
+        self.feed = PriceFeed(initial_prices, script=price_script, seed=seed, volatility=feed_volatility, loop=feed_loop)
+        self.latency_profile = latency_profile or DEFAULT_LATENCY_PROFILE
+        self.error_profile = error_profile or DEFAULT_ERROR_PROFILE
+        self.rng = random.Random(seed)
+
+        self.positions = {}  # symbol -> pozisyon dict'i
+        self.orders = {}  # orderId -> emir dict'i (açık ve kapanmış)
+        self.open_order_ids = []  # zaman sırasına göre açık emirler
+        self.trades = []  # gerçekleşen işlemler (benchmark/analiz için)
+        self.call_counts = {}
+        self._order_seq = 0
+        self._lock = threading.RLock()
+        self._feed_thread = None
+
+    # --- Yardımcılar ---
+    def _instrument(self, endpoint, symbol):
+        instrument = self.instruments.get(symbol)
+        if instrument is None:
+            raise _invalid(endpoint, f"symbol invalid: {symbol}", 10001)
+        return instrument
+
+    def last_price(self, symbol):
+        return self.feed.prices[symbol]
+
+    def _next_order_id(self):
+        self._order_seq += 1
+        return f"sim-{self._order_seq:010d}"
+
+    def _instrument_info(self, spec):
+        symbol = spec["symbol"]
+        base_coin = symbol[:-4] if symbol.endswith("USDT") else symbol
+        return {
+            "symbol": symbol,
+            "contractType": "LinearPerpetual",
+            "status": spec.get("status", "Trading"),
+            "baseCoin": base_coin,
+            "quoteCoin": "USDT",
+            "settleCoin": "USDT",
+            "priceScale": str(max(0, -decimal.Decimal(spec["tickSize"]).as_tuple().exponent)),
+            "leverageFilter": {"minLeverage": "1", "maxLeverage": "100.00", "leverageStep": "0.01"},
+            "priceFilter": {"minPrice": spec["tickSize"], "maxPrice": "1999999.80", "tickSize": spec["tickSize"]},
+            "lotSizeFilter": {
+                "maxOrderQty": spec["maxOrderQty"],
+                "minOrderQty": spec["minOrderQty"],
+                "qtyStep": spec["qtyStep"],
+                "minNotionalValue": spec.get("minNotionalValue", "5"),
+            },
+        }
+
+    def _position_view(self, symbol, position):
+        mark_price = self.last_price(symbol)
+        size = position["size"]
+        direction = 1 if position["side"] == "Buy" else -1
+        unrealised = (mark_price - position["avgPrice"]) * size * direction
+        return {
+            "positionIdx": 0,
+            "symbol": symbol,
+            "side": position["side"],
+            "size": str(size),
+            "avgPrice": str(position["avgPrice"]),
+            "positionValue": str(position["avgPrice"] * size),
+            "markPrice": str(mark_price),
+            "unrealisedPnl": str(unrealised),
+            "cumRealisedPnl": str(position["realisedPnl"]),
+            "stopLoss": position["stopLoss"],
+            "takeProfit": position["takeProfit"],
+            "tpslMode": "Full",
+            "createdTime": str(position["createdTime"]),
+            "updatedTime": str(position["updatedTime"]),
+        }
+
+    def _order_view(self, order):
+        return {key: (str(value) if isinstance(value, (int, float)) and key not in ("reduceOnly",) else value)
+                for key, value in order.items()}
+
+    # --- Eşleştirme Motoru ---
+    def _apply_fill(self, symbol, side, qty, price, reduce_only=False):
+        """
+        One-way mod: aynı yön pozisyonu büyütür, ters yön azaltır/kapatır/çevirir.
+        """
+        now = int(time.time() * 1000)
+        position = self.positions.get(symbol)
+        direction = 1 if side == "Buy" else -1
+
+        if reduce_only and (position is None or position["side"] == side):
+            return 0.0
+        if reduce_only:
+            qty = min(qty, position["size"])
+
+        if position is None:
+            self.positions[symbol] = {
+                "side": side, "size": qty, "avgPrice": price, "stopLoss": "", "takeProfit": "",
+                "realisedPnl": 0.0, "createdTime": now, "updatedTime": now,
+            }
+        elif position["side"] == side:
+            total = position["size"] + qty
+            position["avgPrice"] = (position["avgPrice"] * position["size"] + price * qty) / total
+            position["size"] = total
+            position["updatedTime"] = now
+        else:
+            closed_qty = min(position["size"], qty)
+            position["realisedPnl"] += (position["avgPrice"] - price) * closed_qty * direction
+            remaining = position["size"] - qty
+            if abs(remaining) < 1e-12:
+                del self.positions[symbol]
+            elif remaining > 0:
+                position["size"] = remaining
+                position["updatedTime"] = now
+            else:
+                # Pozisyon ters yöne döndü, SL/TP sıfırlanır
+                self.positions[symbol] = {
+                    "side": side, "size": -remaining, "avgPrice": price, "stopLoss": "", "takeProfit": "",
+                    "realisedPnl": position["realisedPnl"], "createdTime": now, "updatedTime": now,
+                }
+
+        self.trades.append({"symbol": symbol, "side": side, "qty": qty, "price": price, "time": now})
+        return qty
+
+    def _record_execution(self, order, qty, price):
+        """
+        Emrin dolmamış kısmından en fazla qty kadarını doldurur; cumExecQty ve ortalama fiyat birikir.
+        """
+        previous_qty = float(order["cumExecQty"])
+        remaining_qty = max(float(order["qty"]) - previous_qty, 0.0)
+        filled_qty = self._apply_fill(order["symbol"], order["side"], min(float(qty), remaining_qty), price,
+                                      order["reduceOnly"])
+        if filled_qty:
+            order["avgPrice"] = (float(order["avgPrice"]) * previous_qty + price * filled_qty) / (previous_qty + filled_qty)
+            order["cumExecQty"] = previous_qty + filled_qty
+        order["updatedTime"] = int(time.time() * 1000)
+        return filled_qty
+
+    def _fill_order(self, order, price):
+        # Kısmen dolmuş emirde sadece kalan miktar doldurulur
+        filled_qty = self._record_execution(order, order["qty"], price)
+        order["orderStatus"] = "Filled" if filled_qty else "Cancelled"
+        if order["orderId"] in self.open_order_ids:
+            self.open_order_ids.remove(order["orderId"])
+
+    def partial_fill(self, order_id, qty, price=None):
+        """
+        Açık limit emrin bir kısmını doldurur (senaryolar için; eşleştirme motoru emirleri tek seferde doldurur).
+        """
+        with self._lock:
+            order = self.orders[order_id]
+            price = float(order["price"]) if price is None else float(price)
+            if self._record_execution(order, qty, price):
+                order["orderStatus"] = "PartiallyFilled"
+
+    def _is_marketable(self, order, price):
+        limit_price = float(order["price"])
+        return price <= limit_price if order["side"] == "Buy" else price >= limit_price
+
+    def _check_triggers(self, symbol):
+        price = self.last_price(symbol)
+
+        # Çalışan limit emirler
+        for order_id in list(self.open_order_ids):
+            order = self.orders[order_id]
+            if order["symbol"] == symbol and self._is_marketable(order, price):
+                self._fill_order(order, float(order["price"]))
+
+        # Pozisyon SL/TP tetikleri
+        position = self.positions.get(symbol)
+        if position is None:
+            return
+        stop_loss = float(position["stopLoss"]) if position["stopLoss"] else None
+        take_profit = float(position["takeProfit"]) if position["takeProfit"] else None
+        close_side = "Sell" if position["side"] == "Buy" else "Buy"
+        trigger_price = None
+        if position["side"] == "Buy":
+            if stop_loss is not None and price <= stop_loss:
+                trigger_price = stop_loss
+            elif take_profit is not None and price >= take_profit:
+                trigger_price = take_profit
+        else:
+            if stop_loss is not None and price >= stop_loss:
+                trigger_price = stop_loss
+            elif take_profit is not None and price <= take_profit:
+                trigger_price = take_profit
+        if trigger_price is not None:
+            self._apply_fill(symbol, close_side, position["size"], trigger_price, reduce_only=True)
+
+    def step_prices(self, steps=1):
+        """
+        Fiyat akışını ilerletir, limit emirleri eşleştirir ve SL/TP tetiklerini çalıştırır.
+        """
+        with self._lock:
+            for _ in range(steps):
+                self.feed.step()
+                for symbol in self.instruments:
+                    self._check_triggers(symbol)
+            return dict(self.feed.prices)
+
+    def set_price(self, symbol, price):
+        with self._lock:
+            self.feed.prices[symbol] = float(price)
+            self._check_triggers(symbol)
+
+    def start_price_feed(self, interval=DEFAULT_FEED_INTERVAL):
+        """
+        Bot modunda fiyat akışını arka planda gerçek zamanlı ilerletir.
+        """
+        def feed_loop():
+            while True:
+                time.sleep(interval)
+                self.step_prices()
+
+        if self._feed_thread is None:
+            self._feed_thread = threading.Thread(target=feed_loop, daemon=True)
+            self._feed_thread.start()
+
+    # --- Bybit v5 Endpoint'leri ---
+    def get_instruments_info(self, category="linear", symbol=None, limit=500, cursor=None, **kwargs):
+        with self._lock:
+            specs = [self._instrument("get_instruments_info", symbol)] if symbol else list(self.instruments.values())
+            start = int(cursor) if cursor else 0
+            page = specs[start:start + int(limit)]
+            next_cursor = str(start + int(limit)) if start + int(limit) < len(specs) else ""
+            return _ok({"category": category, "list": [self._instrument_info(spec) for spec in page], "nextPageCursor": next_cursor})
+
+    def get_tickers(self, category="linear", symbol=None, **kwargs):
+        with self._lock:
+            symbols = [symbol] if symbol else list(self.instruments)
+            tickers = []
+            for ticker_symbol in symbols:
+                self._instrument("get_tickers", ticker_symbol)
+                price = self.last_price(ticker_symbol)
+                tick = float(self.instruments[ticker_symbol]["tickSize"])
+                tickers.append({
+                    "symbol": ticker_symbol,
+                    "lastPrice": str(price),
+                    "markPrice": str(price),
+                    "bid1Price": str(price - tick),
+                    "ask1Price": str(price + tick),
+                })
+            return _ok({"category": category, "list": tickers})
+
+    def get_positions(self, category="linear", symbol=None, settleCoin=None, **kwargs):
+        with self._lock:
+            if symbol:
+                positions = {symbol: self.positions[symbol]} if symbol in self.positions else {}
+            else:
+                positions = self.positions
+            return _ok({
+                "category": category,
+                "list": [self._position_view(position_symbol, position) for position_symbol, position in positions.items()],
+                "nextPageCursor": "",
+            })
+
+    def place_order(self, category="linear", symbol=None, side=None, orderType="Market", qty=None, price=None,
+                    timeInForce="GoodTillCancel", reduceOnly=False, takeProfit=None, stopLoss=None,
+                    orderLinkId=None, **kwargs):
+        with self._lock:
+            instrument = self._instrument("place_order", symbol)
+            if side not in ("Buy", "Sell"):
+                raise _invalid("place_order", f"invalid side: {side}")
+            if orderType not in ("Market", "Limit"):
+                raise _invalid("place_order", f"invalid orderType: {orderType}")
+            try:
+                qty_value = float(qty)
+            except (TypeError, ValueError):
+                raise _invalid("place_order", f"invalid qty: {qty}")
+            if not _is_multiple(qty, instrument["qtyStep"]):
+                raise _invalid("place_order", f"Qty invalid: not a multiple of qtyStep {instrument['qtyStep']}", 10001)
+            if qty_value < float(instrument["minOrderQty"]) or qty_value > float(instrument["maxOrderQty"]):
+                raise _invalid("place_order", "The number of contracts exceeds minimum or maximum limit allowed", 10001)
+
+            last_price = self.last_price(symbol)
+            if orderType == "Limit":
+                if price is None or not _is_multiple(price, instrument["tickSize"]):
+                    raise _invalid("place_order", f"Price invalid: not a multiple of tickSize {instrument['tickSize']}", 10001)
+                notional_price = float(price)
+            else:
+                notional_price = last_price
+            if not reduceOnly and qty_value * notional_price < float(instrument.get("minNotionalValue", 0)):
+                raise _invalid("place_order", "Order does not meet minimum order value", 110094)
+
+            now = int(time.time() * 1000)
+            order_id = self._next_order_id()
+            order = {
+                "orderId": order_id,
+                "orderLinkId": orderLinkId or "",
+                "symbol": symbol,
+                "side": side,
+                "orderType": orderType,
+                "price": str(price) if orderType == "Limit" else "0",
+                "qty": str(qty),
+                "cumExecQty": 0,
+                "avgPrice": 0,
+                "orderStatus": "New",
+                "timeInForce": timeInForce,
+                "reduceOnly": bool(reduceOnly),
+                "createdTime": now,
+                "updatedTime": now,
+            }
+            self.orders[order_id] = order
+
+            if orderType == "Market":
+                self._fill_order(order, last_price)
+            elif self._is_marketable(order, last_price):
+                self._fill_order(order, float(price))
+            else:
+                self.open_order_ids.append(order_id)
+
+            if order["orderStatus"] == "Filled" and (takeProfit or stopLoss) and symbol in self.positions:
+                if stopLoss:
+                    self.positions[symbol]["stopLoss"] = str(stopLoss)
+                if takeProfit:
+                    self.positions[symbol]["takeProfit"] = str(takeProfit)
+
+            return _ok({"orderId": order_id, "orderLinkId": order["orderLinkId"]})
+
+    def get_open_orders(self, category="linear", symbol=None, orderId=None, settleCoin=None, **kwargs):
+        with self._lock:
+            orders = [self.orders[order_id] for order_id in self.open_order_ids]
+            if symbol:
+                orders = [order for order in orders if order["symbol"] == symbol]
+            if orderId:
+                orders = [order for order in orders if order["orderId"] == orderId]
+            return _ok({"category": category, "list": [self._order_view(order) for order in orders], "nextPageCursor": ""})
+
+    def cancel_order(self, category="linear", symbol=None, orderId=None, **kwargs):
+        with self._lock:
+            if orderId not in self.open_order_ids:
+                raise _invalid("cancel_order", "order not exists or too late to cancel", 110001)
+            order = self.orders[orderId]
+            order["orderStatus"] = "Cancelled"
+            order["updatedTime"] = int(time.time() * 1000)
+            self.open_order_ids.remove(orderId)
+            return _ok({"orderId": orderId, "orderLinkId": order["orderLinkId"]})
+
+    def amend_order(self, category="linear", symbol=None, orderId=None, price=None, qty=None, **kwargs):
+        with self._lock:
+            if orderId not in self.open_order_ids:
+                raise _invalid("amend_order", "order not exists or too late to replace", 110001)
+            order = self.orders[orderId]
+            instrument = self._instrument("amend_order", order["symbol"])
+            if price is not None:
+                if not _is_multiple(price, instrument["tickSize"]):
+                    raise _invalid("amend_order", f"Price invalid: not a multiple of tickSize {instrument['tickSize']}", 10001)
+                order["price"] = str(price)
+            if qty is not None:
+                order["qty"] = str(qty)
+            order["updatedTime"] = int(time.time() * 1000)
+            if self._is_marketable(order, self.last_price(order["symbol"])):
+                self._fill_order(order, float(order["price"]))
+            return _ok({"orderId": orderId, "orderLinkId": order["orderLinkId"]})
+
+    def _batch(self, handler, category, request):
+        results = []
+        ext_info = []
+        for item in request or []:
+            try:
+                handler(category=category, **item)
+                ext_info.append({"code": 0, "msg": "OK"})
+            except InvalidRequestError as e:
+                ext_info.append({"code": e.status_code, "msg": e.message})
+            results.append({"category": category, "symbol": item.get("symbol"), "orderId": item.get("orderId", ""),
+                            "orderLinkId": item.get("orderLinkId", "")})
+        response = _ok({"list": results})
+        response["retExtInfo"] = {"list": ext_info}
+        return response
+
+    def cancel_batch_order(self, category="linear", request=None, **kwargs):
+        return self._batch(self.cancel_order, category, request)
+
+    def amend_batch_order(self, category="linear", request=None, **kwargs):
+        return self._batch(self.amend_order, category, request)
+
+    def get_order_history(self, category="linear", symbol=None, orderId=None, limit=20, **kwargs):
+        with self._lock:
+            orders = [order for order in reversed(list(self.orders.values()))
+                      if order["orderId"] not in self.open_order_ids]
+            if symbol:
+                orders = [order for order in orders if order["symbol"] == symbol]
+            if orderId:
+                orders = [order for order in orders if order["orderId"] == orderId]
+            return _ok({"category": category, "list": [self._order_view(order) for order in orders[:int(limit)]],
+                        "nextPageCursor": ""})
+
+    def set_trading_stop(self, category="linear", symbol=None, takeProfit=None, stopLoss=None, **kwargs):
+        with self._lock:
+            instrument = self._instrument("set_trading_stop", symbol)
+            position = self.positions.get(symbol)
+            if position is None:
+                raise _invalid("set_trading_stop", "can not set tp/sl/ts for zero position", 10001)
+
+            last_price = self.last_price(symbol)
+            is_long = position["side"] == "Buy"
+            for name, value in (("stopLoss", stopLoss), ("takeProfit", takeProfit)):
+                if value is None or value == "":
+                    continue
+                if float(value) == 0:
+                    position[name] = ""  # Bybit'te 0 göndermek SL/TP'yi kaldırır
+                    continue
+                if not _is_multiple(value, instrument["tickSize"]):
+                    raise _invalid("set_trading_stop", f"{name} invalid: not a multiple of tickSize", 10001)
+                below_price = float(value) < last_price
+                if (name == "stopLoss") == is_long and not below_price:
+                    raise _invalid("set_trading_stop", f"{name}:{value} set for {position['side']} position should lower than base_price:{last_price}", 10001)
+                if (name == "stopLoss") != is_long and below_price:
+                    raise _invalid("set_trading_stop", f"{name}:{value} set for {position['side']} position should greater than base_price:{last_price}", 10001)
+                position[name] = str(value)
+
+            position["updatedTime"] = int(time.time() * 1000)
+            return _ok({})
+
+
+class SimulatedHTTP:
+    """
+    pybit HTTP yerine geçen oturum: her çağrıda simülatörün gecikme ve hata profilini uygular.
+    Gecikme oturumun timeout değerini aşarsa requests Timeout fırlatılır (gerçek ağdaki gibi).
+    """
+
+    def __init__(self, simulator, timeout=10):
+        self.simulator = simulator
+        self.timeout = timeout
+
+    def _inject_latency_and_errors(self, endpoint):
+        simulator = self.simulator
+        with simulator._lock:
+            simulator.call_counts[endpoint] = simulator.call_counts.get(endpoint, 0) + 1
+            latency = simulator.latency_profile.get(endpoint, simulator.latency_profile.get("default", {}))
+            delay = max(0.0, (latency.get("mean_ms", 0) + simulator.rng.uniform(-1, 1) * latency.get("jitter_ms", 0)) / 1000)
+            error = simulator.error_profile.get(endpoint, simulator.error_profile.get("default"))
+            fail = error is not None and simulator.rng.random() < error.get("rate", 0)
+
+        if delay > self.timeout:
+            time.sleep(self.timeout)
+            raise requests.exceptions.ReadTimeout(f"SIM {endpoint}: read timed out (timeout={self.timeout})")
+        if delay:
+            time.sleep(delay)
+
+        if fail:
+            kind = error.get("kind", "failed")
+            if kind == "rate_limit":
+                raise _invalid(endpoint, "Too many visits!", 10006)
+            if kind == "timeout":
+                raise requests.exceptions.ReadTimeout(f"SIM {endpoint}: read timed out")
+            raise FailedRequestError(
+                request=f"SIM {endpoint}",
+                message="HTTP status code is not 200.",
+                status_code=error.get("status_code", 502),
+                time=time.strftime("%H:%M:%S"),
+                resp_headers=None,
+            )
+
+    def __getattr__(self, endpoint):
+        if endpoint.startswith("_"):
+            raise AttributeError(endpoint)
+        handler = getattr(self.simulator, endpoint)
+
+        def call(**kwargs):
+            self._inject_latency_and_errors(endpoint)
+            return handler(**kwargs)
+
+        return call
+
+
+def load_simulator_config(path):
+    """
+    JSON konfigürasyon: instruments, price_script, seed, feed_volatility, feed_loop,
+    feed_interval, latency_profile, error_profile anahtarları (hepsi opsiyonel).
+    """
+    if not path:
+        return {}
+    with open(path) as config_file:
+        return json.load(config_file)
+
+
+_simulator = None
+_simulator_lock = threading.Lock()
+
+
+def get_simulator():
+    """
+    Süreç genelinde paylaşılan simülatörü döndürür, ilk çağrıda BYBIT_SIMULATOR_CONFIG'den kurar.
+    """
+    global _simulator
+    with _simulator_lock:
+        if _simulator is None:
+            config = load_simulator_config(os.getenv("BYBIT_SIMULATOR_CONFIG"))
+            _simulator = BybitSimulator(
+                instruments=config.get("instruments"),
+                price_script=config.get("price_script"),
+                seed=config.get("seed", 42),
+                feed_volatility=config.get("feed_volatility", DEFAULT_FEED_VOLATILITY),
+                feed_loop=config.get("feed_loop", False),
+                latency_profile=config.get("latency_profile"),
+                error_profile=config.get("error_profile"),
+            )
+            _simulator.start_price_feed(config.get("feed_interval", DEFAULT_FEED_INTERVAL))
+            print(f"🧪 Bybit simülatörü başlatıldı: {len(_simulator.instruments)} sembol")
+        return _simulator
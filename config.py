@@ -1,3 +1,5 @@
-api_key = "WnsW3MlMksMGwkYT2J"
-api_secret = "y5Hjqj6aaVHGKoZmRPZ80W3GQJJhjQkQRl93"
+import os
+
+api_key = os.getenv("BYBIT_API_KEY")
+api_secret = os.getenv("BYBIT_API_SECRET")
 testnet=False
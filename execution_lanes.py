@@ -0,0 +1,173 @@
+import collections
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# === Sembol Bazlı Yürütme Şeritleri ===
+# Her sinyal sembolüne göre kendi şeridine (lane) düşer. Aynı sembolün sinyalleri sırayla,
+# farklı sembollerin sinyalleri iş parçacığı havuzunda paralel çalışır; global kilit yoktur.
+# Aynı sembolde ters yönlü sinyal geldiğinde ne yapılacağını EXECUTION_CONFLICT_POLICY belirler:
+# - "merge" (varsayılan): şeritte henüz başlamamış sinyaller en yenisiyle birleştirilir (sadece son niyet
+#   çalışır); ters sinyal eskisi gibi mevcut pozisyonla netleşen emir olarak gönderilir
+# - "reject": açık pozisyon/emir varken ters sinyal reddedilir (409)
+# - "reverse": ters sinyalde önce mevcut pozisyon kapatılır, sonra yeni pozisyon açılır
+
+CONFLICT_POLICIES = ("reject", "merge", "reverse")
+EXECUTION_WORKERS = int(os.getenv("EXECUTION_WORKERS", "8"))
+EXECUTION_CONFLICT_POLICY = os.getenv("EXECUTION_CONFLICT_POLICY", "merge").lower()
+EXECUTION_WAIT_TIMEOUT = float(os.getenv("EXECUTION_WAIT_TIMEOUT", "30"))  # Webhook'un sonucu bekleme süresi
+LANE_BATCH_SIZE = 8  # Bir şerit işçiyi bu kadar işten sonra bırakır (yoğun sembol diğerlerini aç bırakmasın)
+
+if EXECUTION_CONFLICT_POLICY not in CONFLICT_POLICIES:
+    print(f"⚠️ Geçersiz EXECUTION_CONFLICT_POLICY: {EXECUTION_CONFLICT_POLICY}, 'merge' kullanılıyor")
+    EXECUTION_CONFLICT_POLICY = "merge"
+
+_executor = ThreadPoolExecutor(max_workers=EXECUTION_WORKERS, thread_name_prefix="lane")
+_lanes = {}  # symbol -> {"queue": deque, "running": bool}
+_lock = threading.Lock()
+_position_side_provider = None
+_rejection_listener = None
+_stats = {"submitted": 0, "executed": 0, "rejected": 0, "merged": 0, "reversed": 0, "failed": 0,
+          "max_queue_depth": 0}
+
+Job = collections.namedtuple("Job", ["side", "task", "future", "is_signal"])
+
+
+def set_position_side_provider(provider):
+    """
+    provider(symbol) -> sembolde açık pozisyon/bekleyen emir yönü ("Buy"/"Sell") veya None.
+    Şerit içinde çağrılır, bu yüzden aynı sembolün önceki sinyallerinin sonucunu görür.
+    """
+    global _position_side_provider
+    _position_side_provider = provider
+
+
+def set_rejection_listener(listener):
+    """
+    Ters sinyal reddedildiğinde çağrılacak fonksiyonu ayarlar: listener(symbol, message)
+    (webhook 202 ile döndükten sonra reddedilen sinyal sessizce kaybolmasın).
+    """
+    global _rejection_listener
+    _rejection_listener = listener
+
+
+def _notify_rejection(symbol, message):
+    if _rejection_listener:
+        try:
+            _rejection_listener(symbol, message)
+        except Exception as e:
+            print(f"❌ Ret bildirim hatası: {e}")
+
+
+def submit(symbol, side, task, is_signal=True):
+    """
+    Sinyali sembolün şeridine ekler ve Future döndürür.
+    task(conflict) şerit içinde çağrılır (conflict: None veya "reverse") ve (sonuç dict'i, HTTP kodu) döndürmelidir.
+    is_signal=False olan işler (ör. limit emir dolumunda SL/TP ekleme) sadece sıraya girer:
+    ters sinyal politikasına takılmaz ve birleştirmede silinmez.
+    """
+    future = Future()
+    with _lock:
+        _stats["submitted"] += 1
+        lane = _lanes.get(symbol)
+        if lane is None:
+            lane = {"queue": collections.deque(), "running": False}
+            _lanes[symbol] = lane
+
+        if EXECUTION_CONFLICT_POLICY == "merge" and is_signal and lane["queue"]:
+            # Başlamamış sinyaller yenisiyle birleştirilir: sadece en son niyet çalışır
+            kept = collections.deque()
+            for queued in lane["queue"]:
+                if not queued.is_signal:
+                    kept.append(queued)
+                    continue
+                queued.future.set_result((
+                    {"status": "merged", "message": f"{symbol} için daha yeni bir sinyal ({side}) bu sinyalin yerini aldı"},
+                    200,
+                ))
+                _stats["merged"] += 1
+            lane["queue"] = kept
+
+        lane["queue"].append(Job(side, task, future, is_signal))
+        _stats["max_queue_depth"] = max(_stats["max_queue_depth"], len(lane["queue"]))
+        if not lane["running"]:
+            lane["running"] = True
+            _executor.submit(_drain, symbol)
+    return future
+
+
+def _execute(symbol, job):
+    conflict = None
+    current_side = None
+    # Yön sadece ters sinyale göre davranan politikalarda sorulur (merge'de gereksiz borsa çağrısı yapılmaz)
+    if _position_side_provider and job.is_signal and EXECUTION_CONFLICT_POLICY in ("reject", "reverse"):
+        current_side = _position_side_provider(symbol)
+    if current_side and current_side != job.side:
+        if EXECUTION_CONFLICT_POLICY == "reject":
+            message = f"❗ {symbol} için açık {current_side} pozisyonu/emri varken ters yönlü ({job.side}) sinyal reddedildi."
+            print(message)
+            with _lock:
+                _stats["rejected"] += 1
+            _notify_rejection(symbol, message)
+            return {"status": "error", "message": message}, 409
+        if EXECUTION_CONFLICT_POLICY == "reverse":
+            conflict = "reverse"
+            with _lock:
+                _stats["reversed"] += 1
+
+    result = job.task(conflict)
+    with _lock:
+        _stats["executed"] += 1
+    return result
+
+
+def _run_job(symbol, job):
+    # Future her durumda sonuçlanır: işin herhangi bir adımı hata verse de webhook/çağıran beklemede kalmaz
+    try:
+        result = _execute(symbol, job)
+    except Exception as e:
+        print(f"❌ {symbol} şeridinde hata: {e}")
+        with _lock:
+            _stats["failed"] += 1
+        result = ({"status": "error", "message": str(e)}, 500)
+    if not job.future.done():
+        job.future.set_result(result)
+
+
+def _drain(symbol):
+    """
+    Şeridin kuyruğunu sırayla işler. LANE_BATCH_SIZE işten sonra işçiyi bırakıp kendini yeniden planlar.
+    Beklenmedik bir hatada da şerit ya yeniden planlanır ya da silinir (sembol kilitli kalmaz).
+    """
+    reschedule = True
+    try:
+        for _ in range(LANE_BATCH_SIZE):
+            with _lock:
+                lane = _lanes[symbol]
+                if not lane["queue"]:
+                    lane["running"] = False
+                    del _lanes[symbol]
+                    reschedule = False
+                    return
+                job = lane["queue"].popleft()
+            _run_job(symbol, job)
+    finally:
+        if reschedule:
+            _executor.submit(_drain, symbol)
+
+
+def is_busy(symbol):
+    """
+    Sembolün şeridinde çalışan veya bekleyen sinyal var mı
+    """
+    return symbol in _lanes
+
+
+def lanes_snapshot():
+    with _lock:
+        return {
+            "policy": EXECUTION_CONFLICT_POLICY,
+            "workers": EXECUTION_WORKERS,
+            "active_lanes": {symbol: len(lane["queue"]) for symbol, lane in _lanes.items()},
+            "stats": dict(_stats),
+        }
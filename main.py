@@ -1,3 +1,4 @@
+import concurrent.futures
 import json
 import traceback
 import requests
@@ -9,6 +10,16 @@ import threading
 from queue import Queue
 from pybit.unified_trading import HTTP  # pybit importu doğru yerde
 
+import bybit_resilience
+import bybit_simulator
+import execution_lanes
+import order_lifecycle
+import position_history
+import price_cache
+import stop_manager
+import symbol_index
+from bybit_resilience import CircuitOpenError
+
 app = Flask(__name__)
 
 # === Ortam Değişkenlerinden Ayarları Yükle ===
@@ -16,42 +27,89 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 TELEGRAM_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
 
-# Bybit API bilgileri
-# BYBIT_API_KEY = os.getenv("BYBIT_API_KEY")
-# BYBIT_API_SECRET = os.getenv("BYBIT_API_SECRET")
-
-BYBIT_API_KEY = os.getenv("BYBIT_API_KEY", "WnsW3MlMksMGwkYT2J")
-BYBIT_API_SECRET = os.getenv("BYBIT_API_SECRET", "y5Hjqj6aaVHGKoZmRPZ80W3GQJJhjQkQRl93")
+# Bybit API bilgileri (sadece ortam değişkenlerinden)
+BYBIT_API_KEY = os.getenv("BYBIT_API_KEY")
+BYBIT_API_SECRET = os.getenv("BYBIT_API_SECRET")
 
 BYBIT_TESTNET_MODE = os.getenv("BYBIT_TESTNET_MODE", "False").lower() in ('true', '1', 't')
+# Yerel simülatör: Bybit'e hiç bağlanmadan (ağ ve API anahtarı olmadan) çalışır
+BYBIT_SIMULATOR_MODE = os.getenv("BYBIT_SIMULATOR_MODE", "False").lower() in ('true', '1', 't')
+
+if not BYBIT_SIMULATOR_MODE and not (BYBIT_API_KEY and BYBIT_API_SECRET):
+    raise RuntimeError("BYBIT_API_KEY ve BYBIT_API_SECRET ortam değişkenleri tanımlı değil. "
+                       "Bybit'e bağlanmadan çalıştırmak için BYBIT_SIMULATOR_MODE=true kullanın.")
+
+# === Bybit Oturumu (timeout, retry ve circuit breaker katmanı ile) ===
+def create_bybit_http_session(timeout):
+    if BYBIT_SIMULATOR_MODE:
+        return bybit_simulator.SimulatedHTTP(bybit_simulator.get_simulator(), timeout=timeout)
+    # Retry'ı bybit_resilience katmanı yapar: pybit'in kendi retry ve uyku mekanizması kapalı
+    return HTTP(
+        api_key=BYBIT_API_KEY,
+        api_secret=BYBIT_API_SECRET,
+        testnet=BYBIT_TESTNET_MODE,
+        timeout=timeout,
+        max_retries=1,
+        retry_delay=0,
+        retry_codes={10002},
+    )
+
+
+bybit_session = bybit_resilience.ResilientSession(create_bybit_http_session)
+
+
+def get_bybit_session():
+    return bybit_session
+
 
 # === Pozisyon Takip Sistemi ===
 position_data = {}  # Bybit hassasiyetine uygun hesaplanmış değerleri tutar
 position_check_interval = 15  # 15 saniye
 
-def check_and_add_sl_tp():
+def check_and_add_sl_tp(only_symbol=None):
     """
-    Her 15 saniyede bir açık pozisyonları kontrol eder ve SL/TP ekler
+    Her 15 saniyede bir açık pozisyonları kontrol eder ve SL/TP ekler.
+    only_symbol verilirse sadece o sembol kontrol edilir (yürütme şeridinden, emir sonrası).
     """
     global position_data
     
     try:
-        session = HTTP(api_key=BYBIT_API_KEY, api_secret=BYBIT_API_SECRET, testnet=BYBIT_TESTNET_MODE)
+        session = get_bybit_session()
         
         # Açık pozisyonları al
-        positions_response = session.get_positions(category="linear", settleCoin="USDT")
+        if only_symbol:
+            positions_response = session.get_positions(category="linear", symbol=only_symbol)
+        else:
+            positions_response = session.get_positions(category="linear", settleCoin="USDT")
         
         if positions_response and positions_response.get('retCode') == 0:
             positions = positions_response.get('result', {}).get('list', [])
             
             print(f"🔍 Pozisyon kontrolü: {len(positions)} pozisyon bulundu")
             
+            if not only_symbol:
+                # Kapanan pozisyonların kuyruktaki SL/TP işlemlerini at
+                open_symbols = {p.get('symbol') for p in positions if float(p.get('size', 0) or 0) > 0}
+                bybit_resilience.discard_protective_calls(open_symbols)
+                
+                # Görüntüyü bellekteki pozisyon geçmişine yaz (/debug ve /history buradan okunur)
+                position_history.record_snapshot(positions)
+            
+            # Trailing/break-even motoruna güncel pozisyonları ve kurallarını ver
+            stop_manager.sync_positions(positions, {s: d.get('stop_rule') for s, d in list(position_data.items())},
+                                        partial=bool(only_symbol))
+            
             for position in positions:
                 symbol = position.get('symbol')
                 side = position.get('side')
                 size = float(position.get('size', 0))
                 avgPrice = float(position.get('avgPrice', 0))  # Pozisyonun ortalama fiyatı
                 
+                # Yürütme şeridi bu sembolde çalışıyorsa SL/TP'yi şerit kendisi ekler (çift güncelleme olmasın)
+                if not only_symbol and execution_lanes.is_busy(symbol):
+                    print(f"⏭️ {symbol} yürütme şeridinde işlemde, SL/TP kontrolü atlandı")
+                    continue
+                
                 # Sadece açık pozisyonları kontrol et
                 if size > 0 and avgPrice > 0:
                     print(f"📊 {symbol} pozisyonu kontrol ediliyor: {side}, {size}, Ortalama Fiyat: {avgPrice}")
@@ -68,11 +126,15 @@ def check_and_add_sl_tp():
                         
                         # Bybit'ten tick size al
                         try:
-                            exchange_info_response = session.get_instruments_info(category="linear", symbol=symbol)
                             tick_size = 0.000001  # Varsayılan
+                            instrument_info = symbol_index.get_instrument(symbol)  # Önce indeksten bak
+                            
+                            if instrument_info is None:
+                                exchange_info_response = session.get_instruments_info(category="linear", symbol=symbol)
+                                if exchange_info_response and exchange_info_response['retCode'] == 0:
+                                    instrument_info = exchange_info_response['result']['list'][0]
                             
-                            if exchange_info_response and exchange_info_response['retCode'] == 0:
-                                instrument_info = exchange_info_response['result']['list'][0]
+                            if instrument_info:
                                 price_filter = instrument_info.get('priceFilter', {})
                                 if 'tickSize' in price_filter:
                                     tick_size = float(price_filter['tickSize'])
@@ -80,12 +142,7 @@ def check_and_add_sl_tp():
                             tick_size = 0.000001
                         
                         # TP/SL hesapla (sabit yüzdelik değerler)
-                        if side == "Buy":  # Long pozisyon
-                            sl_price = round_to_precision(avgPrice * 0.985, tick_size)  # %1.5 altında
-                            tp_price = round_to_precision(avgPrice * 1.03, tick_size)   # %3 üstünde
-                        else:  # Short pozisyon
-                            sl_price = round_to_precision(avgPrice * 1.015, tick_size)  # %1.5 üstünde
-                            tp_price = round_to_precision(avgPrice * 0.97, tick_size)   # %3 altında
+                        sl_price, tp_price = calculate_sl_tp(side, avgPrice, tick_size)
                         
                         print(f"💰 {symbol} için hesaplanan SL: {sl_price}, TP: {tp_price}")
                         
@@ -154,6 +211,9 @@ def check_and_add_sl_tp():
                     else:
                         print(f"ℹ️ {symbol} zaten SL/TP'ye sahip")
                             
+    except CircuitOpenError as e:
+        # Bybit bozuk: bu turu beklemeden atla, breaker bildirimi zaten gönderildi
+        print(f"⏭️ Pozisyon kontrolü atlandı: {e}")
     except Exception as e:
         print(f"❌ Pozisyon kontrolü sırasında hata: {e}")
         send_telegram_message_to_queue(f"❌ Pozisyon kontrolü hatası: {e}")
@@ -166,6 +226,8 @@ def start_position_monitor():
         print("🔄 Pozisyon takip döngüsü başlatıldı")
         while True:
             try:
+                # Breaker açıkken kuyruğa alınan SL/TP işlemlerini tekrar dene
+                get_bybit_session().drain_protective_queue()
                 check_and_add_sl_tp()
                 print(f"⏰ {position_check_interval} saniye bekleniyor...")
                 time.sleep(position_check_interval)
@@ -229,8 +291,180 @@ def telegram_message_sender():
 telegram_sender_thread = threading.Thread(target=telegram_message_sender, daemon=True)
 telegram_sender_thread.start()
 
-# Pozisyon takip sistemini başlat
+
+def notify_breaker_state_change(endpoint, state, last_error):
+    # Her başarısız çağrı yerine sadece breaker durum değişikliklerinde Telegram'a bildir
+    if state == bybit_resilience.STATE_OPEN:
+        send_telegram_message_to_queue(f"⚡ Bybit <b>{endpoint}</b> devre kesici AÇILDI. Son hata: {last_error}")
+    elif state == bybit_resilience.STATE_CLOSED:
+        send_telegram_message_to_queue(f"✅ Bybit <b>{endpoint}</b> devre kesici kapandı, çağrılar normale döndü.")
+
+
+bybit_resilience.set_state_change_listener(notify_breaker_state_change)
+
+def start_symbol_index_refresher():
+    """
+    Sembol indeksini açılışta yükler ve periyodik olarak yeniler
+    """
+    def refresh_loop():
+        while True:
+            try:
+                if not symbol_index.is_ready() or symbol_index.is_stale():
+                    session = get_bybit_session()
+                    symbol_index.refresh_symbol_index(session)
+            except Exception as e:
+                print(f"❌ Sembol indeksi yenilenirken hata: {e}")
+            # Yüklenemediyse kısa süre sonra tekrar dene
+            time.sleep(60 if symbol_index.is_ready() else 10)
+
+    refresh_thread = threading.Thread(target=refresh_loop, daemon=True)
+    refresh_thread.start()
+
+
+def attach_sl_tp_on_fill(record, fill_price, exec_qty):
+    """
+    Limit emir dolduğunda SL/TP'yi gerçek dolum fiyatına göre ekler (sembolün yürütme şeridinde çalışır)
+    """
+    symbol = record["symbol"]
+    side = record["side"]
+    session = get_bybit_session()
+    sl_price, tp_price = calculate_sl_tp(side, fill_price, record["tick_size"])
+
+    # Dolum sonrası o yönde açık pozisyon yoksa (ör. kapandı veya ters sinyalle çevrildi) dokunma;
+    # pozisyonda daha sıkı bir SL varsa (ör. trailing motoru taşıdıysa) onu geri gevşetme
+    position_open = False
+    positions_response = session.get_positions(category="linear", symbol=symbol)
+    for position in positions_response.get('result', {}).get('list', []):
+        if position.get('side') != side or float(position.get('size', 0) or 0) <= 0:
+            continue
+        position_open = True
+        existing_sl = float(position.get('stopLoss') or 0)
+        if existing_sl:
+            sl_price = max(sl_price, existing_sl) if side == "Buy" else min(sl_price, existing_sl)
+
+    if not position_open:
+        print(f"ℹ️ {symbol} limit emir dolumu sonrası {side} pozisyonu yok, SL/TP eklenmedi")
+        return {"status": "skipped", "message": f"{symbol} için açık {side} pozisyonu yok"}, 200
+
+    response = session.set_trading_stop(
+        category="linear",
+        symbol=symbol,
+        stopLoss=str(sl_price),
+        takeProfit=str(tp_price),
+        slOrderType="Market",
+        tpOrderType="Market",
+        tpslMode="Full"
+    )
+    if response and response.get('retCode') == 0:
+        # Trailing motoru bu seviyeden gevşek bekleyen güncellemeyi göndermesin
+        stop_manager.record_stop_loss(symbol, sl_price)
+        entry = position_data.get(symbol, {})
+        position_data[symbol] = {
+            'sl_rounded': sl_price,
+            'tp_rounded': tp_price,
+            'side': side,
+            'entry_rounded': fill_price,
+            'stop_rule': entry.get('stop_rule'),
+            'timestamp': time.time()
+        }
+        print(f"✅ {symbol} limit emir dolumunda SL/TP eklendi: SL {sl_price}, TP {tp_price}")
+        send_telegram_message_to_queue(
+            f"✅ {symbol} limit emri doldu ({exec_qty} @ {fill_price}). SL: {sl_price}, TP: {tp_price} eklendi")
+        return {"status": "ok", "stopLoss": sl_price, "takeProfit": tp_price}, 200
+    print(f"❌ {symbol} limit emir dolumunda SL/TP eklenemedi: {response}")
+    return {"status": "error", "message": str(response)}, 500
+
+
+def handle_limit_fill(record, fill_price, exec_qty):
+    # Dolum işlemi sembolün şeridine girer: aynı sembolün sinyalleriyle position_data/SL yarışmaz
+    execution_lanes.submit(
+        record["symbol"],
+        record["side"],
+        lambda conflict: attach_sl_tp_on_fill(record, fill_price, exec_qty),
+        is_signal=False
+    )
+
+
+def start_order_lifecycle_monitor():
+    """
+    Limit emir yaşam döngüsü turlarını başlatır (sadece takipte emir varken Bybit'e gider)
+    """
+    def lifecycle_loop():
+        while True:
+            try:
+                if order_lifecycle.has_working_orders():
+                    order_lifecycle.run_lifecycle_pass(get_bybit_session(), handle_limit_fill)
+            except CircuitOpenError as e:
+                print(f"⏭️ Limit emir turu atlandı: {e}")
+            except Exception as e:
+                print(f"❌ Limit emir yaşam döngüsü hatası: {e}")
+            time.sleep(order_lifecycle.LIMIT_ORDER_CHECK_INTERVAL)
+
+    lifecycle_thread = threading.Thread(target=lifecycle_loop, daemon=True)
+    lifecycle_thread.start()
+
+
+def record_stop_update(symbol, level):
+    if symbol in position_data:
+        position_data[symbol]['sl_rounded'] = level
+
+
+def dispatch_stop_update(symbol, send):
+    # SL yazımı sembolün şeridinde: dolum sonrası SL/TP ekleme ve sinyallerle sıralı çalışır
+    def run(conflict):
+        try:
+            send()
+        except CircuitOpenError as e:
+            return {"status": "error", "message": str(e)}, 503
+        return {"status": "ok"}, 200
+
+    execution_lanes.submit(symbol, None, run, is_signal=False)
+
+
+def start_stop_manager():
+    """
+    Trailing stop / break-even motorunu başlatır (tek toplu ticker görüntüsüyle tüm pozisyonlar)
+    """
+    def stop_loop():
+        while True:
+            try:
+                if stop_manager.has_tracked_positions():
+                    session = get_bybit_session()
+                    stop_manager.evaluate(price_cache.refresh_prices(session))
+                    stop_manager.flush(session, on_update=record_stop_update, dispatch=dispatch_stop_update)
+            except CircuitOpenError as e:
+                print(f"⏭️ Stop motoru turu atlandı: {e}")
+            except Exception as e:
+                print(f"❌ Stop motoru hatası: {e}")
+            time.sleep(stop_manager.STOP_ENGINE_INTERVAL)
+
+    stop_thread = threading.Thread(target=stop_loop, daemon=True)
+    stop_thread.start()
+
+
+def start_history_flusher():
+    """
+    Bellekteki pozisyon geçmişini periyodik olarak diske yazar
+    """
+    def flush_loop():
+        while True:
+            time.sleep(position_history.HISTORY_FLUSH_INTERVAL)
+            try:
+                position_history.flush_to_disk()
+            except Exception as e:
+                print(f"❌ Pozisyon geçmişi diske yazılırken hata: {e}")
+
+    if position_history.HISTORY_DIR:
+        flush_thread = threading.Thread(target=flush_loop, daemon=True)
+        flush_thread.start()
+
+
+# Sembol indeksini, pozisyon takip, limit emir, stop ve geçmiş sistemlerini başlat
+start_symbol_index_refresher()
 start_position_monitor()
+start_order_lifecycle_monitor()
+start_stop_manager()
+start_history_flusher()
 
 
 # === Yardımcı Fonksiyon: Fiyatları hassasiyete yuvarlama (float döndürür) ===
@@ -245,6 +479,15 @@ def round_to_precision(value, precision_step):
     return float(rounded_value)
 
 
+# === Sabit yüzdelik SL/TP hesaplama (Bybit hassasiyetine yuvarlanmış) ===
+def calculate_sl_tp(side, price, tick_size):
+    if side == "Buy":
+        # Long pozisyon: SL %1.5 altında, TP %3 üstünde
+        return round_to_precision(price * 0.985, tick_size), round_to_precision(price * 1.03, tick_size)
+    # Short pozisyon: SL %1.5 üstünde, TP %3 altında
+    return round_to_precision(price * 1.015, tick_size), round_to_precision(price * 0.97, tick_size)
+
+
 # === Miktarı, borsa adım hassasiyetine göre yuvarlama ve string olarak döndürme ===
 def round_quantity_to_exchange_precision(value, precision_step):
     if value is None:
@@ -284,109 +527,81 @@ def round_quantity_to_exchange_precision(value, precision_step):
     return f"{rounded_d_value_by_step:.{final_decimals}f}"
 
 
-# === Ana Webhook Endpoint'i (TradingView Sinyallerini İşler) ===
-# === Ana Webhook Endpoint'i (TradingView Sinyallerini İşler) ===
-@app.route("/webhook", methods=["POST"])
-def webhook():
-    # --- JSON Ayrıştırma ve Hata Yakalama ---
-    data = None
-    raw_data_text = None
-    headers = dict(request.headers)
-    order = None  # KRİTİK DEĞİŞİKLİK: order değişkenini fonksiyon başında inisiyalize et
-
-    try:
-        # Önce gelen veriyi ham metin olarak oku
-        raw_data_text = request.get_data(as_text=True)
-
-        # 🔍 Log çıktısı ekle
-        print("Webhook'tan gelen veri:", raw_data_text)
-
-        # Ham metni JSON olarak ayrıştırmayı dene
-        data = json.loads(raw_data_text)
-
-    except json.JSONDecodeError as e:
-        print("❌ JSON ayrıştırma hatası:", str(e))
-        print("📦 Ham veri:", raw_data_text)
-        return jsonify({"success": False, "error": "JSON parse error", "details": str(e)}), 400
-        # JSON ayrıştırma hatası olursa detaylı log ve Telegram mesajı gönder
-        error_msg = f"❗ Webhook verisi JSON olarak ayrıştırılamadı. JSONDecodeError: {e}\n" \
-                    f"Headers: <pre>{json.dumps(headers, indent=2)}</pre>\n" \
-                    f"Raw Data (ilk 500 karakter): <pre>{raw_data_text[:500]}</pre>"
-        print(error_msg)
-        send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-        return jsonify({"status": "error", "message": "JSON ayrıştırma hatası veya geçersiz veri"}), 400
-    except Exception as e:
-        # Diğer beklenmedik hataları yakala (örn. request.get_data() hatası)
-        error_msg = f"❗ Webhook verisi alınırken/işlenirken beklenmedik hata: {e}\n" \
-                    f"Headers: <pre>{json.dumps(headers, indent=2)}</pre>\n" \
-                    f"Raw Data (ilk 500 karakter): <pre>{raw_data_text[:500] if raw_data_text else 'N/A'}</pre>"
-        print(error_msg)
-        send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-        return jsonify({"status": "error", "message": "Webhook işleme hatası"}), 500
+# === Ters Sinyal: mevcut pozisyonu kapatma ('reverse' politikası) ===
+def close_position_for_reverse(session, symbol, new_side):
+    cancelled = order_lifecycle.cancel_symbol_orders(session, symbol)
+    if cancelled:
+        print(f"🔄 {symbol} ters sinyal: {cancelled} limit emir iptal edildi")
+
+    positions_response = session.get_positions(category="linear", symbol=symbol)
+    for position in positions_response.get('result', {}).get('list', []):
+        size = position.get('size')
+        if float(size or 0) > 0 and position.get('side') != new_side:
+            close_order = session.place_order(
+                category="linear",
+                symbol=symbol,
+                side=new_side,
+                orderType="Market",
+                qty=str(size),
+                reduceOnly=True,
+                timeInForce="GoodTillCancel",
+            )
+            print(f"🔄 {symbol} ters sinyal: {position.get('side')} {size} pozisyonu kapatıldı: {close_order}")
+            send_telegram_message_to_queue(f"🔄 {symbol} ters sinyal: mevcut {position.get('side')} {size} pozisyonu kapatıldı")
 
-    # Eğer buraya kadar geldiysek, data başarılı bir şekilde ayrıştırılmış demektir.
-    print(f"📩 Webhook verisi alındı: {data}")
-    signal_message_for_telegram = f"<b>🔔 TradingView Ham Sinyali:</b>\n<pre>{json.dumps(data, indent=2)}</pre>"
-    send_telegram_message_to_queue(signal_message_for_telegram)
 
+def current_position_side(symbol):
+    """
+    Sembolde açık pozisyon veya bekleyen emir yönü. Şerit içinde çağrılır: pozisyon sembole özel
+    get_positions ile borsadan okunur (takip görüntüsü 15 sn eski olabilir, stop sonrası ters sinyal
+    yanlışlıkla reddedilmesin). Bybit'e ulaşılamazsa bellekteki son duruma düşer.
+    """
+    working_side = order_lifecycle.working_side(symbol)
+    if working_side:
+        return working_side
     try:
-        # --- Sinyal Verilerini Çekme ---
-        symbol = data.get("symbol")
-        side = data.get("side")
-        entry = data.get("entry")
-        sl = data.get("sl")
-        tp = data.get("tp")
+        positions_response = get_bybit_session().get_positions(category="linear", symbol=symbol)
+        if positions_response and positions_response.get('retCode') == 0:
+            for position in positions_response.get('result', {}).get('list', []):
+                if float(position.get('size', 0) or 0) > 0:
+                    return position.get('side')
+            return None
+    except Exception as e:
+        print(f"⚠️ {symbol} pozisyon yönü Bybit'ten alınamadı, bellekteki durum kullanılıyor: {e}")
+    snapshot = position_history.latest_snapshot()
+    entry = position_data.get(symbol)
+    # Son takip görüntüsünden sonra gönderilen emir varsa onun yönü geçerli
+    if entry and (snapshot["ts"] is None or entry['timestamp'] > snapshot["ts"]):
+        return entry['side']
+    for position in snapshot["positions"]:
+        if position["symbol"] == symbol:
+            return position["side"]
+    return None
 
-        # Giriş verilerini kontrol et (None kontrolü)
-        if not all([symbol, side, entry, sl, tp]):
-            error_msg = f"❗ Eksik sinyal verisi! Symbol: {symbol}, Side: {side}, Entry: {entry}, SL: {sl}, TP: {tp}"
-            print(error_msg)
-            send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": error_msg}), 400
 
-        # Side (işlem yönü) kontrolü
-        side_for_bybit = ""
-        if side and side.lower() == "buy":
-            side_for_bybit = "Buy"
-        elif side and side.lower() == "sell":
-            side_for_bybit = "Sell"
-        elif side and side.lower() == "long":
-            side_for_bybit = "Buy"
-        elif side and side.lower() == "short":
-            side_for_bybit = "Sell"
-        else:
-            error_msg = f"❗ Geçersiz işlem yönü (side): {side}. 'Buy' veya 'Sell' bekleniyor."
-            print(error_msg)
-            send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": error_msg}), 400
+def notify_signal_rejected(symbol, message):
+    # Webhook 202 ile döndüyse sonuç sadece Telegram'dan görülür
+    send_telegram_message_to_queue(f"🚨 Bot Hatası: {message}")
 
-        # Sembol temizliği
-        if ":" in symbol:
-            symbol = symbol.split(":")[-1]
-            print(f"Sembol TradingView prefix'inden temizlendi: {symbol}")
-            send_telegram_message_to_queue(f"ℹ️ Sembol prefix temizlendi: <b>{symbol}</b>")
 
-        if symbol.endswith(".P"):
-            symbol = symbol[:-2]
-            print(f"Sembol '.P' ekinden temizlendi: {symbol}")
-            send_telegram_message_to_queue(f"ℹ️ Sembol '.P' eki temizlendi: <b>{symbol}</b>")
+execution_lanes.set_position_side_provider(current_position_side)
+execution_lanes.set_rejection_listener(notify_signal_rejected)
 
-        symbol = symbol.upper()
-        send_telegram_message_to_queue(f"ℹ️ Nihai işlem sembolü: <b>{symbol}</b>")
 
-        # Fiyat verilerini float'a çevirme
-        try:
-            entry = float(entry)
-            sl = float(sl)
-            tp = float(tp)
-        except (ValueError, TypeError) as ve:
-            error_msg = f"❗ Fiyat verileri sayıya çevrilemedi: Entry={entry}, SL={sl}, TP={tp}. Hata: {ve}. Lütfen Pine Script alert formatını kontrol edin."
-            print(error_msg)
-            send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": "Geçersiz fiyat formatı"}), 400
+# === Sinyal Yürütme (sembolün yürütme şeridinde çalışır) ===
+def execute_signal(data, symbol, side, side_for_bybit, entry, sl, tp, conflict=None):
+    """
+    Doğrulanmış sinyal için emir hesaplar ve Bybit'e gönderir. (sonuç dict'i, HTTP kodu) döndürür.
+    """
+    order = None
 
+    try:
         # Bybit API oturumu
-        session = HTTP(api_key=BYBIT_API_KEY, api_secret=BYBIT_API_SECRET, testnet=BYBIT_TESTNET_MODE)
+        session = get_bybit_session()
+
+        # Ters sinyal + 'reverse' politikası: önce mevcut pozisyonu kapat
+        if conflict == "reverse":
+            close_position_for_reverse(session, symbol, side_for_bybit)
 
         # Bybit'ten enstrüman bilgilerini al
         tick_size = 0.000001
@@ -396,12 +611,19 @@ def webhook():
         min_order_value = 0.0
 
         try:
-            exchange_info_response = session.get_instruments_info(category="linear", symbol=symbol)
-            if exchange_info_response and exchange_info_response['retCode'] == 0 and exchange_info_response['result'][
-                'list']:
-                instrument_info = exchange_info_response['result']['list'][0]
+            # Önce indeksteki enstrüman bilgisini kullan, yoksa Bybit'e sor
+            instrument_info = symbol_index.get_instrument(symbol)
+            exchange_info_response = None
+            if instrument_info is None:
+                exchange_info_response = session.get_instruments_info(category="linear", symbol=symbol)
+                if exchange_info_response and exchange_info_response['retCode'] == 0 and exchange_info_response['result'][
+                    'list']:
+                    instrument_info = exchange_info_response['result']['list'][0]
+
+            if instrument_info:
                 price_filter = instrument_info.get('priceFilter', {})
-                lot_filter = instrument_info.get('lotFilter', {})
+                # Bybit v5 miktar filtresi 'lotSizeFilter' anahtarında gelir
+                lot_filter = instrument_info.get('lotSizeFilter') or instrument_info.get('lotFilter', {})
 
                 if 'tickSize' in price_filter:
                     tick_size = float(price_filter['tickSize'])
@@ -419,6 +641,8 @@ def webhook():
 
                 if 'minOrderValue' in lot_filter:
                     min_order_value = float(lot_filter['minOrderValue'])
+                elif 'minNotionalValue' in lot_filter:
+                    min_order_value = float(lot_filter['minNotionalValue'])
 
                 print(
                     f"Bybit {symbol} için API'den alınan Tick Size: {tick_size}, Lot Size: {lot_size}, Min Order Qty: {min_order_qty}, Max Order Qty: {max_order_qty}, Min Order Value: {min_order_value}")
@@ -430,6 +654,8 @@ def webhook():
                 send_telegram_message_to_queue(
                     f"⚠️ {symbol} için Bybit hassasiyet bilgisi alınamadı. Varsayılanlar kullanılıyor.")
 
+        except CircuitOpenError:
+            raise
         except Exception as api_e:
             error_msg_api = f"Bybit sembol/hassasiyet bilgisi alınırken hata: {api_e}. Varsayılan hassasiyetler kullanılıyor."
             print(error_msg_api)
@@ -445,7 +671,7 @@ def webhook():
             error_msg = f"❗ GİRİŞ FİYATI ({entry_rounded}) ve STOP LOSS FİYATI ({sl_rounded}) YUVARLAMA SONRASI AYNI GELDİ. Risk anlamsız olduğu için emir gönderilmiyor. Lütfen Pine Script stratejinizi kontrol edin ve SL'nin Girişten belirgin bir mesafede olduğundan emin olun."
             print(error_msg)
             send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": error_msg}), 400
+            return {"status": "error", "message": error_msg}, 400
 
         # === POZİSYON BÜYÜKLÜĞÜ AYARI (Kullanıcının tercihine göre 40$ ile işlem açacak) ===
         sabitMiktar_usd = 400.0  # Pozisyon değeri sabit olarak 40$ olarak ayarlandı
@@ -454,7 +680,7 @@ def webhook():
             error_msg = "❗ Giriş fiyatı sıfır geldi. Pozisyon miktarı hesaplanamıyor."
             print(error_msg)
             send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": error_msg}), 400
+            return {"status": "error", "message": error_msg}, 400
 
         # Adet miktarını sabit dolar değerine göre hesapla
         calculated_quantity_float = sabitMiktar_usd / entry_rounded
@@ -474,19 +700,19 @@ def webhook():
             error_msg = f"❗ Nihai miktar ({quantity_float_for_checks}) minimum emir miktarı ({min_order_qty}) altındadır. Emir gönderilmiyor."
             print(error_msg)
             send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": error_msg}), 400
+            return {"status": "error", "message": error_msg}, 400
 
         if quantity_float_for_checks > max_order_qty:
             error_msg = f"❗ Nihai miktar ({quantity_float_for_checks}) maksimum emir miktarı ({max_order_qty}) üstündedir. Emir gönderilmiyor."
             print(error_msg)
             send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": error_msg}), 400
+            return {"status": "error", "message": error_msg}, 400
 
         if quantity_float_for_checks <= 0:
             error_msg = f"❗ Nihai hesaplanan miktar sıfır veya negatif ({quantity_float_for_checks}). Emir gönderilmiyor."
             print(error_msg)
             send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": error_msg}), 400
+            return {"status": "error", "message": error_msg}, 400
 
         # Gizli minimum işlem değerini kontrol etmek için
         implied_min_order_value = max(10.0, min_order_value)
@@ -496,7 +722,7 @@ def webhook():
             error_msg = f"❗ Nihai pozisyon değeri ({order_value:.2f} USDT) belirlenen minimum emir değeri ({implied_min_order_value} USDT) altındadır. Emir gönderilmiyor."
             print(error_msg)
             send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
-            return jsonify({"status": "error", "message": error_msg}), 400
+            return {"status": "error", "message": error_msg}, 400
 
         actual_risk_if_sl_hit = abs(quantity_float_for_checks * (entry_rounded - sl_rounded))
 
@@ -513,14 +739,7 @@ def webhook():
         send_telegram_message_to_queue(trade_summary)
 
         # Stop Loss ve Take Profit hesaplama - Yuvarlanmış entry fiyatı kullan
-        if side_for_bybit == "Buy":
-            # Long pozisyon: SL %1.5 altında, TP %3 üstünde
-            sl_rounded = round_to_precision(entry_rounded * 0.985, tick_size)
-            tp_rounded = round_to_precision(entry_rounded * 1.03, tick_size)
-        else:
-            # Short pozisyon: SL %1.5 üstünde, TP %3 altında
-            sl_rounded = round_to_precision(entry_rounded * 1.015, tick_size)
-            tp_rounded = round_to_precision(entry_rounded * 0.97, tick_size)
+        sl_rounded, tp_rounded = calculate_sl_tp(side_for_bybit, entry_rounded, tick_size)
 
         # Emir türü seçimi (Market veya Limit)
         order_type = data.get("orderType", "Market")  # Varsayılan Market
@@ -555,18 +774,31 @@ def webhook():
                 'tp_rounded': tp_rounded,  # ✅ Bybit hassasiyetine uygun TP
                 'side': side_for_bybit,
                 'entry_rounded': entry_rounded,  # ✅ Giriş fiyatı da tutalım
+                'stop_rule': stop_manager.build_stop_rule(data),  # Break-even/trailing kuralı
                 'timestamp': time.time()
             }
             print(f"✅ {symbol} pozisyonu dict'e eklendi (SL: {sl_rounded}, TP: {tp_rounded})")
-            send_telegram_message_to_queue(f"✅ {symbol} pozisyonu dict'e eklendi (15s içinde SL/TP eklenecek)")
             
-            # Hemen SL/TP eklemeyi dene (15 saniye beklemeden)
-            try:
-                print(f"🚀 {symbol} için hemen SL/TP ekleniyor...")
-                check_and_add_sl_tp()
-            except Exception as e:
-                print(f"⚠️ {symbol} için hemen SL/TP eklenirken hata: {e}")
-                send_telegram_message_to_queue(f"⚠️ {symbol} için hemen SL/TP eklenirken hata: {e}")
+            if order_type == "Limit":
+                # Limit emir: dolum, zaman aşımı ve fiyat kayması yaşam döngüsü yöneticisinde takip edilir.
+                # Kayma, emir anındaki piyasa fiyatına göre ölçülür (alınamazsa ilk turda belirlenir)
+                try:
+                    reference_price = price_cache.refresh_prices(session).get(symbol)
+                except Exception as e:
+                    print(f"⚠️ {symbol} için referans fiyat alınamadı: {e}")
+                    reference_price = None
+                order_lifecycle.track_order(order.get('result', {}).get('orderId'), symbol, side_for_bybit,
+                                            quantity_str_for_bybit, entry_rounded, tick_size, reference_price)
+                send_telegram_message_to_queue(f"📌 {symbol} limit emri takibe alındı (SL/TP dolumda eklenecek)")
+            else:
+                send_telegram_message_to_queue(f"✅ {symbol} pozisyonu dict'e eklendi (15s içinde SL/TP eklenecek)")
+                # Hemen SL/TP eklemeyi dene (15 saniye beklemeden)
+                try:
+                    print(f"🚀 {symbol} için hemen SL/TP ekleniyor...")
+                    check_and_add_sl_tp(only_symbol=symbol)
+                except Exception as e:
+                    print(f"⚠️ {symbol} için hemen SL/TP eklenirken hata: {e}")
+                    send_telegram_message_to_queue(f"⚠️ {symbol} için hemen SL/TP eklenirken hata: {e}")
             order_info = order.get('result', {})
             success_message = (
                 f"<b>✅ Bybit Emir Başarılı!</b>\n"
@@ -578,13 +810,167 @@ def webhook():
                 f"<b>Durum:</b> {order.get('retMsg', 'Başarılı')}"
             )
             send_telegram_message_to_queue(success_message)
-            return jsonify({"status": "ok", "order": order})
+            return {"status": "ok", "order": order}, 200
         else:
             error_response_msg = order.get('retMsg', 'Bilinmeyen Bybit hatası.')
             full_error_details = json.dumps(order, indent=2)
             error_message_telegram = f"<b>🚨 Bybit Emir Hatası:</b>\n{error_response_msg}\nSinyal: {symbol}, {side}, Miktar: {quantity_float_for_checks}\n<pre>{full_error_details}</pre>"
             send_telegram_message_to_queue(error_message_telegram)
-            return jsonify({"status": "error", "message": error_response_msg}), 500
+            return {"status": "error", "message": error_response_msg}, 500
+
+    except CircuitOpenError as e:
+        # Bybit bozuk: beklemeden reddet
+        error_msg = f"⚡ Bybit şu an erişilemiyor, sinyal işlenmedi: {e}"
+        print(error_msg)
+        send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
+        return {"status": "error", "message": str(e)}, 503
+
+    except Exception as e:
+        # Genel hata yakalama, traceback ile detaylı bilgi logla
+        error_message_full = f"🔥 KRİTİK GENEL HATA webhook işlenirken: {str(e)}\n{traceback.format_exc()}"
+        print(error_message_full)
+        # Eğer order değişkeni burada tanımlı değilse, sadece hata mesajını gönder.
+        if 'order' not in locals() or order is None:
+            send_telegram_message_to_queue(
+                f"<b>🚨 KRİTİK BOT HATASI! (order tanımsız)</b>\n<pre>{error_message_full}</pre>")
+        else:
+            # Eğer order tanımlı ama bir hata varsa, Bybit hata detaylarını da ekleyelim.
+            # Bu durum normalde yukarıdaki 'else' bloğunda yakalanır, ama yine de bir güvenlik önlemi.
+            error_response_msg = order.get('retMsg', 'Bilinmeyen Bybit hatası.') if isinstance(order, dict) else str(
+                order)
+            send_telegram_message_to_queue(
+                f"<b>🚨 KRİTİK BOT HATASI!</b>\n{error_response_msg}\n<pre>{error_message_full}</pre>")
+
+        return {"status": "error", "message": str(e)}, 500
+
+
+# === Ana Webhook Endpoint'i (TradingView Sinyallerini İşler) ===
+# === Ana Webhook Endpoint'i (TradingView Sinyallerini İşler) ===
+@app.route("/webhook", methods=["POST"])
+def webhook():
+    # --- JSON Ayrıştırma ve Hata Yakalama ---
+    data = None
+    raw_data_text = None
+    headers = dict(request.headers)
+    order = None  # KRİTİK DEĞİŞİKLİK: order değişkenini fonksiyon başında inisiyalize et
+
+    try:
+        # Önce gelen veriyi ham metin olarak oku
+        raw_data_text = request.get_data(as_text=True)
+
+        # 🔍 Log çıktısı ekle
+        print("Webhook'tan gelen veri:", raw_data_text)
+
+        # Ham metni JSON olarak ayrıştırmayı dene
+        data = json.loads(raw_data_text)
+
+    except json.JSONDecodeError as e:
+        print("❌ JSON ayrıştırma hatası:", str(e))
+        print("📦 Ham veri:", raw_data_text)
+        return jsonify({"success": False, "error": "JSON parse error", "details": str(e)}), 400
+        # JSON ayrıştırma hatası olursa detaylı log ve Telegram mesajı gönder
+        error_msg = f"❗ Webhook verisi JSON olarak ayrıştırılamadı. JSONDecodeError: {e}\n" \
+                    f"Headers: <pre>{json.dumps(headers, indent=2)}</pre>\n" \
+                    f"Raw Data (ilk 500 karakter): <pre>{raw_data_text[:500]}</pre>"
+        print(error_msg)
+        send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
+        return jsonify({"status": "error", "message": "JSON ayrıştırma hatası veya geçersiz veri"}), 400
+    except Exception as e:
+        # Diğer beklenmedik hataları yakala (örn. request.get_data() hatası)
+        error_msg = f"❗ Webhook verisi alınırken/işlenirken beklenmedik hata: {e}\n" \
+                    f"Headers: <pre>{json.dumps(headers, indent=2)}</pre>\n" \
+                    f"Raw Data (ilk 500 karakter): <pre>{raw_data_text[:500] if raw_data_text else 'N/A'}</pre>"
+        print(error_msg)
+        send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
+        return jsonify({"status": "error", "message": "Webhook işleme hatası"}), 500
+
+    # Eğer buraya kadar geldiysek, data başarılı bir şekilde ayrıştırılmış demektir.
+    print(f"📩 Webhook verisi alındı: {data}")
+    signal_message_for_telegram = f"<b>🔔 TradingView Ham Sinyali:</b>\n<pre>{json.dumps(data, indent=2)}</pre>"
+    send_telegram_message_to_queue(signal_message_for_telegram)
+
+    try:
+        # --- Sinyal Verilerini Çekme ---
+        symbol = data.get("symbol")
+        side = data.get("side")
+        entry = data.get("entry")
+        sl = data.get("sl")
+        tp = data.get("tp")
+
+        # Giriş verilerini kontrol et (None kontrolü)
+        if not all([symbol, side, entry, sl, tp]):
+            error_msg = f"❗ Eksik sinyal verisi! Symbol: {symbol}, Side: {side}, Entry: {entry}, SL: {sl}, TP: {tp}"
+            print(error_msg)
+            send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
+            return jsonify({"status": "error", "message": error_msg}), 400
+
+        # Side (işlem yönü) kontrolü
+        side_for_bybit = ""
+        if side and side.lower() == "buy":
+            side_for_bybit = "Buy"
+        elif side and side.lower() == "sell":
+            side_for_bybit = "Sell"
+        elif side and side.lower() == "long":
+            side_for_bybit = "Buy"
+        elif side and side.lower() == "short":
+            side_for_bybit = "Sell"
+        else:
+            error_msg = f"❗ Geçersiz işlem yönü (side): {side}. 'Buy' veya 'Sell' bekleniyor."
+            print(error_msg)
+            send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
+            return jsonify({"status": "error", "message": error_msg}), 400
+
+        # Sembol çözümleme (indeksten, ağ çağrısı yapılmadan)
+        raw_symbol = symbol
+        price_multiplier = 1
+        if symbol_index.is_ready():
+            symbol, price_multiplier = symbol_index.resolve_symbol_with_multiplier(raw_symbol)
+            if not symbol:
+                error_msg = f"❗ Bilinmeyen sembol: {raw_symbol}. Bybit'te işlem gören bir linear sembol bulunamadı, emir gönderilmiyor."
+                print(error_msg)
+                send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
+                return jsonify({"status": "error", "message": error_msg}), 400
+        else:
+            # İndeks henüz yüklenmediyse eski temizleme kuralıyla devam et
+            symbol = symbol_index.normalize_symbol(raw_symbol)
+            if symbol.endswith(".P"):
+                symbol = symbol[:-2]
+            print(f"⚠️ Sembol indeksi hazır değil, {symbol} doğrulanmadan kullanılıyor.")
+
+        if symbol != raw_symbol:
+            print(f"Sembol çözümlendi: {raw_symbol} -> {symbol}")
+            send_telegram_message_to_queue(f"ℹ️ Nihai işlem sembolü: <b>{symbol}</b> (sinyal: {raw_symbol})")
+
+        # Fiyat verilerini float'a çevirme
+        try:
+            entry = float(entry)
+            sl = float(sl)
+            tp = float(tp)
+        except (ValueError, TypeError) as ve:
+            error_msg = f"❗ Fiyat verileri sayıya çevrilemedi: Entry={entry}, SL={sl}, TP={tp}. Hata: {ve}. Lütfen Pine Script alert formatını kontrol edin."
+            print(error_msg)
+            send_telegram_message_to_queue(f"🚨 Bot Hatası: {error_msg}")
+            return jsonify({"status": "error", "message": "Geçersiz fiyat formatı"}), 400
+
+        # Taban ticker çarpanlı kontrata çözüldüyse (PEPEUSDT -> 1000PEPEUSDT) fiyatlar kontrat fiyatına çevrilir
+        if price_multiplier != 1:
+            entry, sl, tp = entry * price_multiplier, sl * price_multiplier, tp * price_multiplier
+            print(f"Fiyatlar {symbol} kontratı için x{price_multiplier} ölçeklendi: Entry={entry}, SL={sl}, TP={tp}")
+            send_telegram_message_to_queue(
+                f"ℹ️ {raw_symbol} fiyatları {symbol} kontratı için x{price_multiplier} ölçeklendi: Entry={entry}, SL={sl}, TP={tp}")
+
+        # Aynı sembolün sinyalleri sırayla, farklı semboller paralel yürütülür
+        future = execution_lanes.submit(
+            symbol,
+            side_for_bybit,
+            lambda conflict: execute_signal(data, symbol, side, side_for_bybit, entry, sl, tp, conflict)
+        )
+        try:
+            result, status_code = future.result(timeout=execution_lanes.EXECUTION_WAIT_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            # Sinyal şeritte beklemeye devam eder, sonucu Telegram'a düşer
+            return jsonify({"status": "queued", "message": f"{symbol} sinyali yürütme kuyruğunda"}), 202
+        return jsonify(result), status_code
 
     except Exception as e:
         # Genel hata yakalama, traceback ile detaylı bilgi logla
@@ -612,41 +998,81 @@ def home():
 @app.route("/debug", methods=["GET"])
 def debug():
     """
-    Debug endpoint'i - pozisyon durumunu gösterir
+    Debug endpoint'i - pozisyon durumunu gösterir (son takip görüntüsünden, borsaya gitmeden)
     """
     try:
-        session = HTTP(api_key=BYBIT_API_KEY, api_secret=BYBIT_API_SECRET, testnet=BYBIT_TESTNET_MODE)
-        positions_response = session.get_positions(category="linear", settleCoin="USDT")
+        snapshot = position_history.latest_snapshot()
         
         debug_info = {
             "position_data": position_data,
-            "positions_count": 0,
-            "positions": []
+            "positions_count": snapshot["positions_count"],
+            "positions": [],
+            "snapshot_time": snapshot["ts"],
+            "snapshot_age_seconds": round(time.time() - snapshot["ts"], 1) if snapshot["ts"] else None,
+            "history": position_history.history_stats(),
+            "resilience": bybit_resilience.resilience_snapshot(),
+            "limit_orders": order_lifecycle.lifecycle_snapshot(),
+            "stop_manager": stop_manager.stop_manager_snapshot(),
+            "execution_lanes": execution_lanes.lanes_snapshot()
         }
         
-        if positions_response and positions_response.get('retCode') == 0:
-            positions = positions_response.get('result', {}).get('list', [])
-            debug_info["positions_count"] = len(positions)
-            
-            for position in positions:
-                symbol = position.get('symbol')
-                side = position.get('side')
-                size = float(position.get('size', 0))
-                
-                if size > 0:
-                    debug_info["positions"].append({
-                        "symbol": symbol,
-                        "side": side,
-                        "size": size,
-                        "stopLoss": position.get('stopLoss'),
-                        "takeProfit": position.get('takeProfit'),
-                        "in_our_list": symbol in position_data
-                    })
+        for position in snapshot["positions"]:
+            debug_info["positions"].append({
+                "symbol": position["symbol"],
+                "side": position["side"],
+                "size": position["size"],
+                "stopLoss": position["stop_loss"],
+                "takeProfit": position["take_profit"],
+                "in_our_list": position["symbol"] in position_data
+            })
         
         return jsonify(debug_info)
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": str(e), "resilience": bybit_resilience.resilience_snapshot()}), 500
+
+
+@app.route("/history", methods=["GET"])
+def history():
+    """
+    Bellekteki pozisyon geçmişi: ?symbol=BTCUSDT&start=<unix sn>&end=<unix sn>&step=<sn>&limit=<satır>
+    """
+    try:
+        def float_arg(name):
+            value = request.args.get(name)
+            return float(value) if value not in (None, "") else None
+
+        symbol = request.args.get("symbol")
+        if symbol:
+            symbol = symbol_index.resolve_symbol(symbol) or symbol_index.normalize_symbol(symbol)
+        step = float_arg("step")
+        limit = int(request.args.get("limit", position_history.HISTORY_QUERY_LIMIT))
+        rows = position_history.query(
+            symbol=symbol,
+            start=float_arg("start"),
+            end=float_arg("end"),
+            step=step if step and step > 0 else None,
+            limit=max(1, min(limit, position_history.HISTORY_QUERY_LIMIT)),
+        )
+        return jsonify({"rows": len(rows["ts"]), "columns": rows, "stats": position_history.history_stats()})
+    except ValueError as e:
+        return jsonify({"error": f"Geçersiz parametre: {e}"}), 400
+
+
+@app.route("/orders", methods=["GET"])
+def orders():
+    """
+    Takipteki limit emirler, dolum oranı ve dolum süresi
+    """
+    return jsonify(order_lifecycle.lifecycle_snapshot())
+
+
+@app.route("/resilience", methods=["GET"])
+def resilience():
+    """
+    Bybit devre kesici durumları, trip sayıları ve retry bütçesi
+    """
+    return jsonify(bybit_resilience.resilience_snapshot())
 
 
 if __name__ == "__main__":
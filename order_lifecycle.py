@@ -0,0 +1,358 @@
+import collections
+import decimal
+import math
+import os
+import threading
+import time
+
+import price_cache
+
+# === Limit Emir Yaşam Döngüsü ===
+# Webhook'tan gönderilen Limit emirleri bellekte takip eder. Her turda:
+# - Açık emirler tek çağrıyla alınır, fiyatlar paylaşılan toplu ticker önbelleğinden okunur
+# - Zaman aşımına uğrayan emirler iptal, fiyattan uzaklaşan emirler yeniden fiyatlanır (veya iptal)
+# - İptal/güncellemeler emir başına değil, tur başına toplu (batch) çağrıyla yapılır
+# - Dolan emirler için SL/TP dolum anında eklenir (on_fill callback'i)
+# - Dolum oranı ve dolum süresi raporlanır
+
+LIMIT_ORDER_TIMEOUT = float(os.getenv("LIMIT_ORDER_TIMEOUT", "900"))  # 15 dakikada dolmayan emir iptal edilir
+LIMIT_ORDER_MAX_DRIFT_PCT = float(os.getenv("LIMIT_ORDER_MAX_DRIFT_PCT", "0.5"))  # Piyasa emir verildiğinden beri %0.5'ten fazla kaçarsa
+LIMIT_ORDER_DRIFT_ACTION = os.getenv("LIMIT_ORDER_DRIFT_ACTION", "amend").lower()  # "amend" (yeniden fiyatla) veya "cancel"
+LIMIT_ORDER_MAX_REPRICES = int(os.getenv("LIMIT_ORDER_MAX_REPRICES", "3"))  # Bu kadar yeniden fiyatlamadan sonra iptal
+LIMIT_ORDER_MAX_REPRICE_PCT = float(os.getenv("LIMIT_ORDER_MAX_REPRICE_PCT", "1.0"))  # Yeni fiyat sinyal fiyatından en fazla %1 uzaklaşabilir
+LIMIT_ORDER_CHECK_INTERVAL = float(os.getenv("LIMIT_ORDER_CHECK_INTERVAL", "5"))  # saniye
+BATCH_REQUEST_SIZE = 10  # Bybit batch cancel/amend tek istekte en fazla 10 emir kabul eder
+FILL_TIME_SAMPLE_SIZE = 500
+
+# Linear emirlerde kısmen dolup iptal edilen emir "Cancelled" (cumExecQty > 0) olarak kapanır;
+# "PartiallyFilledCanceled" sadece spot içindir. Dolum cumExecQty'den anlaşılır.
+CLOSED_STATUSES = {"Filled", "PartiallyFilledCanceled", "Cancelled", "Rejected", "Deactivated"}
+
+_working_orders = {}  # orderId -> takip kaydı
+_lock = threading.Lock()
+_stats = {
+    "tracked": 0,
+    "filled": 0,
+    "partially_filled": 0,
+    "cancelled_timeout": 0,
+    "cancelled_drift": 0,
+    "cancelled_external": 0,
+    "cancelled_reverse": 0,
+    "amended": 0,
+    "batch_calls": 0,
+}
+_fill_times = collections.deque(maxlen=FILL_TIME_SAMPLE_SIZE)
+
+
+def track_order(order_id, symbol, side, qty, price, tick_size, reference_price=None):
+    """
+    Webhook'tan gönderilen Limit emri takibe alır.
+    reference_price: emir verildiği andaki piyasa fiyatı; fiyat kayması buna göre ölçülür
+    (verilmezse ilk turda görülen fiyat kullanılır).
+    """
+    with _lock:
+        _working_orders[order_id] = {
+            "orderId": order_id,
+            "symbol": symbol,
+            "side": side,
+            "qty": float(qty),
+            "price": float(price),
+            "signal_price": float(price),
+            "reference_price": float(reference_price) if reference_price else None,
+            "tick_size": tick_size,
+            "created_at": time.time(),
+            "reprices": 0,
+            "cum_exec_qty": 0.0,
+            "pending_action": None,  # Gönderilmiş iptal sebebi ("timeout"/"drift")
+        }
+        _stats["tracked"] += 1
+    print(f"📌 Limit emir takibe alındı: {symbol} {side} {qty} @ {price} ({order_id})")
+
+
+def has_working_orders():
+    return bool(_working_orders)
+
+
+def working_side(symbol):
+    """
+    Sembolde takipte olan (iptali gönderilmemiş) limit emrin yönü, yoksa None.
+    """
+    with _lock:
+        for record in _working_orders.values():
+            if record["symbol"] == symbol and not record["pending_action"]:
+                return record["side"]
+    return None
+
+
+def cancel_symbol_orders(session, symbol, reason="reverse"):
+    """
+    Sembolün takipteki tüm limit emirlerini tek toplu çağrıyla iptal eder (ör. pozisyon ters çevrilirken).
+    İptali kabul edilen emir sayısını döndürür; reddedilen emirler normal takibe geri döner.
+    """
+    with _lock:
+        records = [record for record in _working_orders.values()
+                   if record["symbol"] == symbol and not record["pending_action"]]
+        for record in records:
+            record["pending_action"] = reason
+    cancelled = 0
+    for index, batch in enumerate(_chunks(records, BATCH_REQUEST_SIZE)):
+        try:
+            response = session.cancel_batch_order(category="linear",
+                                                  request=[{"symbol": symbol, "orderId": record["orderId"]} for record in batch])
+        except Exception:
+            # Gönderilemeyen iptaller zaman aşımı/fiyat kayması için tekrar değerlendirilir
+            with _lock:
+                for record in records[index * BATCH_REQUEST_SIZE:]:
+                    record["pending_action"] = None
+                _stats["batch_calls"] += 1
+            raise
+        cancelled += _apply_cancel_results(response, batch)
+        with _lock:
+            _stats["batch_calls"] += 1
+    return cancelled
+
+
+def _apply_cancel_results(response, batch):
+    """
+    Toplu iptal yanıtındaki emir bazlı sonuçları işler; reddedilen emirlerin iptal işaretini kaldırır.
+    """
+    results = response.get('retExtInfo', {}).get('list', []) if response else []
+    accepted = 0
+    with _lock:
+        for index, record in enumerate(batch):
+            if (response is None or response.get('retCode') != 0
+                    or (index < len(results) and results[index].get('code', 0) != 0)):
+                record["pending_action"] = None
+            else:
+                accepted += 1
+    return accepted
+
+
+def _round_to_tick(value, tick_size, down):
+    # Alış fiyatı aşağı, satış fiyatı yukarı yuvarlanır: emir piyasadan uzak tarafta kalır
+    if not tick_size or tick_size <= 0:
+        return value
+    steps = value / tick_size
+    steps = math.floor(steps + 1e-9) if down else math.ceil(steps - 1e-9)
+    # Decimal ile çarp: float çarpımı tick katı olmayan değer üretebilir
+    return float(decimal.Decimal(steps) * decimal.Decimal(str(tick_size)))
+
+
+def _repriced_limit(record, last_price):
+    """
+    Kayan emir için yeni fiyat: emrin piyasaya olan mesafesi korunur, sinyal fiyatından en fazla
+    LIMIT_ORDER_MAX_REPRICE_PCT uzaklaşır ve hemen dolacak (piyasa fiyatına değen) fiyat verilmez.
+    Emri iyileştiren bir fiyat kalmadıysa None döner.
+    """
+    tick_size = record["tick_size"] or 0
+    shifted = record["price"] + (last_price - record["reference_price"])
+    if record["side"] == "Buy":
+        new_price = min(shifted, record["signal_price"] * (1 + LIMIT_ORDER_MAX_REPRICE_PCT / 100), last_price - tick_size)
+        new_price = _round_to_tick(new_price, tick_size, down=True)
+        return new_price if new_price > record["price"] else None
+    new_price = max(shifted, record["signal_price"] * (1 - LIMIT_ORDER_MAX_REPRICE_PCT / 100), last_price + tick_size)
+    new_price = _round_to_tick(new_price, tick_size, down=False)
+    return new_price if new_price < record["price"] else None
+
+
+def _fetch_all(session_call, **params):
+    items = []
+    cursor = None
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        response = session_call(**params)
+        if not response or response.get('retCode') != 0:
+            raise RuntimeError(f"Bybit yanıtı başarısız: {response}")
+        result = response.get('result', {})
+        items.extend(result.get('list', []))
+        cursor = result.get('nextPageCursor')
+        if not cursor:
+            return items
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _resolve_closed_orders(session, closed_ids, on_fill):
+    """
+    Açık listede olmayan emirlerin son durumunu tek geçmiş çağrısıyla çözer.
+    """
+    history = {}
+    response = session.get_order_history(category="linear", limit=50)
+    if response and response.get('retCode') == 0:
+        history = {order.get('orderId'): order for order in response.get('result', {}).get('list', [])}
+
+    for order_id in closed_ids:
+        order = history.get(order_id)
+        if order is None:
+            # Son 50 emirde yoksa tek tek sor (nadir durum)
+            single = session.get_order_history(category="linear", orderId=order_id)
+            orders = single.get('result', {}).get('list', []) if single else []
+            order = orders[0] if orders else None
+        if order is None or order.get('orderStatus') not in CLOSED_STATUSES:
+            continue
+
+        with _lock:
+            record = _working_orders.pop(order_id, None)
+        if record is None:
+            continue
+
+        status = order.get('orderStatus')
+        exec_qty = float(order.get('cumExecQty') or 0)
+        if exec_qty > 0:
+            # Tam dolum veya kısmen dolup iptal (zaman aşımı/kayma iptali dahil): pozisyon açıldı
+            partial = exec_qty < record["qty"]
+            fill_price = float(order.get('avgPrice') or record["price"])
+            time_to_fill = max(0.0, float(order.get('updatedTime') or time.time() * 1000) / 1000 - record["created_at"])
+            with _lock:
+                _stats["filled"] += 1
+                if partial:
+                    _stats["partially_filled"] += 1
+                _fill_times.append(time_to_fill)
+            fill_label = f"kısmen doldu ({status})" if partial else "doldu"
+            print(f"✅ Limit emir {fill_label}: {record['symbol']} {exec_qty} @ {fill_price} ({time_to_fill:.1f} sn)")
+            if record["pending_action"] == "reverse":
+                # Ters sinyalde pozisyon zaten kapatıldı/çevrildi: eski yön için SL/TP eklenmez
+                continue
+            try:
+                on_fill(record, fill_price, exec_qty)
+            except Exception as e:
+                print(f"❌ {record['symbol']} dolum sonrası SL/TP eklenirken hata: {e}")
+        else:
+            reason = record["pending_action"] or "external"
+            with _lock:
+                _stats[f"cancelled_{reason}"] += 1
+            print(f"🗑️ Limit emir kapandı ({status}, sebep: {reason}): {record['symbol']} ({order_id})")
+
+
+def run_lifecycle_pass(session, on_fill, prices=None):
+    """
+    Takipteki tüm Limit emirler için tek tur: durum güncelle, dolumları işle,
+    zaman aşımı/fiyat kayması için toplu iptal ve güncelleme gönder.
+    prices verilmezse paylaşılan fiyat önbelleği kullanılır.
+    """
+    if not _working_orders:
+        return
+
+    open_orders = {order.get('orderId'): order for order in
+                   _fetch_all(session.get_open_orders, category="linear", settleCoin="USDT", limit=50)}
+
+    with _lock:
+        tracked_ids = list(_working_orders)
+    closed_ids = [order_id for order_id in tracked_ids if order_id not in open_orders]
+    if closed_ids:
+        _resolve_closed_orders(session, closed_ids, on_fill)
+
+    if prices is None:
+        prices = price_cache.refresh_prices(session)
+
+    now = time.time()
+    cancels = []
+    amends = []
+    with _lock:
+        for order_id, record in _working_orders.items():
+            if order_id not in open_orders or record["pending_action"]:
+                continue
+            record["cum_exec_qty"] = float(open_orders[order_id].get('cumExecQty') or 0)
+
+            if now - record["created_at"] >= LIMIT_ORDER_TIMEOUT:
+                record["pending_action"] = "timeout"
+                cancels.append(record)
+                continue
+
+            last_price = prices.get(record["symbol"])
+            if not last_price:
+                continue
+            reference = record["reference_price"]
+            if reference is None:
+                record["reference_price"] = last_price
+                continue
+            # Kayma, limit fiyatla piyasa arasındaki mesafe değil (piyasanın altındaki alış normal girişdir),
+            # emir verildiğinden/son yeniden fiyatlamadan beri piyasanın emrin aleyhine ne kadar kaçtığıdır
+            if record["side"] == "Buy":
+                drift_pct = (last_price - reference) / reference * 100
+            else:
+                drift_pct = (reference - last_price) / reference * 100
+            if drift_pct <= LIMIT_ORDER_MAX_DRIFT_PCT:
+                continue
+
+            if LIMIT_ORDER_DRIFT_ACTION == "amend" and record["reprices"] < LIMIT_ORDER_MAX_REPRICES:
+                new_price = _repriced_limit(record, last_price)
+                if new_price is not None:
+                    amends.append((record, new_price, last_price))
+                    continue
+            record["pending_action"] = "drift"
+            cancels.append(record)
+
+    for batch in _chunks(cancels, BATCH_REQUEST_SIZE):
+        request_list = [{"symbol": record["symbol"], "orderId": record["orderId"]} for record in batch]
+        try:
+            response = session.cancel_batch_order(category="linear", request=request_list)
+            # Reddedilen iptaller sonraki turda tekrar değerlendirilir
+            _apply_cancel_results(response, batch)
+            print(f"🗑️ {len(batch)} limit emir için toplu iptal gönderildi")
+        except Exception as e:
+            # Sonraki turda tekrar denenecek
+            print(f"❌ Toplu iptal hatası: {e}")
+            with _lock:
+                for record in batch:
+                    record["pending_action"] = None
+        with _lock:
+            _stats["batch_calls"] += 1
+
+    for batch in _chunks(amends, BATCH_REQUEST_SIZE):
+        request_list = [{"symbol": record["symbol"], "orderId": record["orderId"], "price": str(new_price)}
+                        for record, new_price, _ in batch]
+        try:
+            response = session.amend_batch_order(category="linear", request=request_list)
+            results = response.get('retExtInfo', {}).get('list', []) if response else []
+            with _lock:
+                for index, (record, new_price, last_price) in enumerate(batch):
+                    if index < len(results) and results[index].get('code', 0) != 0:
+                        continue
+                    record["price"] = new_price
+                    record["reference_price"] = last_price
+                    record["reprices"] += 1
+                    _stats["amended"] += 1
+            print(f"✏️ {len(batch)} limit emir için toplu yeniden fiyatlama gönderildi")
+        except Exception as e:
+            print(f"❌ Toplu yeniden fiyatlama hatası: {e}")
+        with _lock:
+            _stats["batch_calls"] += 1
+
+
+def lifecycle_snapshot():
+    """
+    Takipteki emirler, dolum oranı ve dolum süresi istatistikleri.
+    """
+    with _lock:
+        stats = dict(_stats)
+        fill_times = sorted(_fill_times)
+        working = [
+            {
+                "orderId": record["orderId"],
+                "symbol": record["symbol"],
+                "side": record["side"],
+                "price": record["price"],
+                "signal_price": record["signal_price"],
+                "reference_price": record["reference_price"],
+                "cum_exec_qty": record["cum_exec_qty"],
+                "reprices": record["reprices"],
+                "age_seconds": round(time.time() - record["created_at"], 1),
+                "pending_action": record["pending_action"],
+            }
+            for record in _working_orders.values()
+        ]
+
+    closed = stats["filled"] + sum(count for key, count in stats.items() if key.startswith("cancelled_"))
+    stats["fill_ratio"] = round(stats["filled"] / closed, 4) if closed else None
+    stats["time_to_fill"] = {
+        "avg": round(sum(fill_times) / len(fill_times), 2),
+        "p50": round(fill_times[len(fill_times) // 2], 2),
+        "max": round(fill_times[-1], 2),
+    } if fill_times else None
+    stats["working_orders"] = working
+    return stats
@@ -0,0 +1,257 @@
+import json
+import math
+import os
+import struct
+import threading
+import time
+from array import array
+
+# === Sütunlu Pozisyon Geçmişi ===
+# Pozisyon takip döngüsünün her get_positions görüntüsü bellekte sabit kapasiteli bir halka
+# tampona yazılır: alan başına bir dizi (float64), semboller intern edilmiş tam sayı id olarak.
+# /debug ve /history borsaya gitmeden buradan cevaplanır. Diske yazılmamış satırlar periyodik
+# olarak kompakt ikili dosyaya eklenir (read_history_file ile okunur).
+
+HISTORY_CAPACITY = int(os.getenv("HISTORY_CAPACITY", "100000"))  # Satır sayısı; bellek tavanı ~ kapasite * 61 byte
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "300"))  # saniye
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")  # Boş bırakılırsa diske yazılmaz
+HISTORY_QUERY_LIMIT = 5000
+HISTORY_MIN_STEP = 0.001  # saniye; daha küçük step aralık indeksini taşırır (int(ts // step) OverflowError)
+
+FLOAT_COLUMNS = ("ts", "size", "avg_price", "mark_price", "unrealised_pnl", "stop_loss", "take_profit")
+FILE_MAGIC = b"PHB1"
+BLOCK_HEADER = struct.Struct("<4sII")  # magic, satır sayısı, sembol tablosu uzunluğu
+
+_columns = {name: array('d', bytes(8 * HISTORY_CAPACITY)) for name in FLOAT_COLUMNS}
+_symbol_column = array('I', bytes(4 * HISTORY_CAPACITY))
+_side_column = array('b', bytes(HISTORY_CAPACITY))  # 1: Buy, -1: Sell, 0: yok
+_symbol_ids = {}  # sembol -> id
+_symbol_names = []  # id -> sembol
+_total_rows = 0  # Şimdiye kadar yazılan satır sayısı (halka indeksi = _total_rows % kapasite)
+_flushed_rows = 0  # Diske yazılan son satırın mantıksal indeksi
+_dropped_rows = 0  # Diske yazılamadan üzerine yazılan satırlar
+_last_snapshot = {"ts": None, "positions_count": 0, "first_row": 0, "row_count": 0}
+_lock = threading.Lock()
+
+
+def reset(capacity=None):
+    """
+    Tamponu boşaltır, istenirse farklı kapasiteyle yeniden ayırır (senaryolar için).
+    """
+    global HISTORY_CAPACITY, _columns, _symbol_column, _side_column, _total_rows, _flushed_rows, _dropped_rows
+
+    with _lock:
+        HISTORY_CAPACITY = capacity or HISTORY_CAPACITY
+        _columns = {name: array('d', bytes(8 * HISTORY_CAPACITY)) for name in FLOAT_COLUMNS}
+        _symbol_column = array('I', bytes(4 * HISTORY_CAPACITY))
+        _side_column = array('b', bytes(HISTORY_CAPACITY))
+        _symbol_ids.clear()
+        del _symbol_names[:]
+        _total_rows = _flushed_rows = _dropped_rows = 0
+        _last_snapshot.update({"ts": None, "positions_count": 0, "first_row": 0, "row_count": 0})
+
+
+def _intern(symbol):
+    symbol_id = _symbol_ids.get(symbol)
+    if symbol_id is None:
+        symbol_id = len(_symbol_names)
+        _symbol_ids[symbol] = symbol_id
+        _symbol_names.append(symbol)
+    return symbol_id
+
+
+def _to_float(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    # Bybit boş SL/TP'yi "" veya "0" olarak döndürür
+    return number if number != 0 else math.nan
+
+
+def _oldest_row():
+    return max(0, _total_rows - HISTORY_CAPACITY)
+
+
+def record_snapshot(positions, ts=None):
+    """
+    Bir get_positions görüntüsünü (sadece açık pozisyonlar) tampona yazar.
+    """
+    global _total_rows, _dropped_rows
+
+    ts = ts or time.time()
+    open_positions = [position for position in positions if float(position.get('size', 0) or 0) > 0]
+    with _lock:
+        first_row = _total_rows
+        for position in open_positions:
+            index = _total_rows % HISTORY_CAPACITY
+            if _total_rows - _flushed_rows >= HISTORY_CAPACITY and HISTORY_DIR:
+                _dropped_rows += 1
+            _columns["ts"][index] = ts
+            _columns["size"][index] = float(position.get('size', 0) or 0)
+            _columns["avg_price"][index] = _to_float(position.get('avgPrice'))
+            _columns["mark_price"][index] = _to_float(position.get('markPrice'))
+            _columns["unrealised_pnl"][index] = float(position.get('unrealisedPnl') or 0)
+            _columns["stop_loss"][index] = _to_float(position.get('stopLoss'))
+            _columns["take_profit"][index] = _to_float(position.get('takeProfit'))
+            _symbol_column[index] = _intern(position.get('symbol'))
+            _side_column[index] = 1 if position.get('side') == "Buy" else -1 if position.get('side') == "Sell" else 0
+            _total_rows += 1
+        _last_snapshot.update({
+            "ts": ts,
+            "positions_count": len(positions),
+            "first_row": first_row,
+            "row_count": len(open_positions),
+        })
+
+
+def _row(logical_index):
+    index = logical_index % HISTORY_CAPACITY
+    side = _side_column[index]
+    row = {name: _columns[name][index] for name in FLOAT_COLUMNS}
+    for name in ("avg_price", "mark_price", "stop_loss", "take_profit"):
+        if math.isnan(row[name]):
+            row[name] = None
+    row["symbol"] = _symbol_names[_symbol_column[index]]
+    row["side"] = "Buy" if side == 1 else "Sell" if side == -1 else ""
+    return row
+
+
+def latest_snapshot():
+    """
+    Son görüntüdeki açık pozisyonlar (borsaya gitmeden).
+    """
+    with _lock:
+        first_row = max(_last_snapshot["first_row"], _oldest_row())
+        rows = [_row(logical_index) for logical_index in
+                range(first_row, _last_snapshot["first_row"] + _last_snapshot["row_count"])]
+        return {"ts": _last_snapshot["ts"], "positions_count": _last_snapshot["positions_count"], "positions": rows}
+
+
+def _first_row_at_or_after(ts):
+    # Zaman damgaları monoton arttığı için halka üzerinde ikili arama
+    low, high = _oldest_row(), _total_rows
+    while low < high:
+        middle = (low + high) // 2
+        if _columns["ts"][middle % HISTORY_CAPACITY] < ts:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def query(symbol=None, start=None, end=None, step=None, limit=HISTORY_QUERY_LIMIT):
+    """
+    Zaman aralığı sorgusu. step (saniye) verilirse her sembol için her aralığın son satırı döner.
+    Sonuç sütunlu biçimdedir: {"ts": [...], "symbol": [...], ...}
+    """
+    result = {name: [] for name in ("ts", "symbol", "side") + FLOAT_COLUMNS[1:]}
+    with _lock:
+        symbol_id = _symbol_ids.get(symbol) if symbol else None
+        if symbol and symbol_id is None:
+            return result
+        first = _first_row_at_or_after(start) if start is not None else _oldest_row()
+        last = _first_row_at_or_after(end + 1e-9) if end is not None else _total_rows
+        if step:
+            step = max(step, HISTORY_MIN_STEP)
+
+        selected = []
+        bucket_rows = {}  # (symbol_id, aralık) -> satır
+        for logical_index in range(first, last):
+            index = logical_index % HISTORY_CAPACITY
+            if symbol_id is not None and _symbol_column[index] != symbol_id:
+                continue
+            if step:
+                key = (_symbol_column[index], int(_columns["ts"][index] // step))
+                if key not in bucket_rows:
+                    selected.append(key)
+                bucket_rows[key] = logical_index
+            else:
+                selected.append(logical_index)
+
+        if step:
+            selected = [bucket_rows[key] for key in selected]
+        # Limit aşılırsa en yeni satırlar döner
+        for logical_index in selected[-limit:]:
+            row = _row(logical_index)
+            for name in result:
+                result[name].append(row[name])
+    return result
+
+
+def flush_to_disk(directory=None):
+    """
+    Diske yazılmamış satırları günlük ikili dosyaya tek blok olarak ekler.
+    Blok: başlık, JSON sembol tablosu, sonra sırayla her sütunun ham baytları.
+    """
+    global _flushed_rows
+
+    directory = HISTORY_DIR if directory is None else directory
+    if not directory:
+        return 0
+    with _lock:
+        first = max(_flushed_rows, _oldest_row())
+        last = _total_rows
+        if first >= last:
+            return 0
+        indexes = [logical_index % HISTORY_CAPACITY for logical_index in range(first, last)]
+        columns = {name: array('d', (_columns[name][index] for index in indexes)) for name in FLOAT_COLUMNS}
+        symbol_column = array('I', (_symbol_column[index] for index in indexes))
+        side_column = array('b', (_side_column[index] for index in indexes))
+        symbol_table = json.dumps(_symbol_names).encode()
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, time.strftime("positions-%Y%m%d.bin", time.gmtime(columns["ts"][0])))
+    with open(path, "ab") as history_file:
+        history_file.write(BLOCK_HEADER.pack(FILE_MAGIC, last - first, len(symbol_table)))
+        history_file.write(symbol_table)
+        for name in FLOAT_COLUMNS:
+            columns[name].tofile(history_file)
+        symbol_column.tofile(history_file)
+        side_column.tofile(history_file)
+
+    with _lock:
+        _flushed_rows = last
+    print(f"💾 Pozisyon geçmişi diske yazıldı: {last - first} satır -> {path}")
+    return last - first
+
+
+def read_history_file(path):
+    """
+    flush_to_disk ile yazılan dosyayı okur; her blok için sütun dict'i üretir (analiz için).
+    """
+    with open(path, "rb") as history_file:
+        while True:
+            header = history_file.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                return
+            magic, row_count, table_length = BLOCK_HEADER.unpack(header)
+            if magic != FILE_MAGIC:
+                raise ValueError(f"Geçersiz geçmiş dosyası bloğu: {path}")
+            symbol_names = json.loads(history_file.read(table_length))
+            block = {}
+            for name in FLOAT_COLUMNS:
+                block[name] = array('d')
+                block[name].fromfile(history_file, row_count)
+            symbol_ids = array('I')
+            symbol_ids.fromfile(history_file, row_count)
+            sides = array('b')
+            sides.fromfile(history_file, row_count)
+            block["symbol"] = [symbol_names[symbol_id] for symbol_id in symbol_ids]
+            block["side"] = ["Buy" if side == 1 else "Sell" if side == -1 else "" for side in sides]
+            yield block
+
+
+def history_stats():
+    with _lock:
+        return {
+            "capacity": HISTORY_CAPACITY,
+            "rows_in_memory": min(_total_rows, HISTORY_CAPACITY),
+            "total_rows": _total_rows,
+            "flushed_rows": _flushed_rows,
+            "dropped_unflushed_rows": _dropped_rows,
+            "symbols": len(_symbol_names),
+            "memory_bytes": sum(column.itemsize * len(column) for column in _columns.values())
+                            + _symbol_column.itemsize * len(_symbol_column) + _side_column.itemsize * len(_side_column),
+            "last_snapshot_ts": _last_snapshot["ts"],
+        }
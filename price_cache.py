@@ -0,0 +1,45 @@
+import threading
+import time
+
+# === Paylaşılan Fiyat Önbelleği ===
+# Tüm linear semboller için tek bir toplu get_tickers çağrısıyla fiyat anlık görüntüsü tutar.
+# Limit emir yöneticisi ve stop motoru sembol başına istek yerine bu önbelleği kullanır.
+
+PRICE_CACHE_MAX_AGE = 2.0  # saniye; bu süreden yeni görüntü varsa Bybit'e gidilmez
+
+_prices = {}  # symbol -> son fiyat
+_updated_at = 0
+_refresh_lock = threading.Lock()
+
+
+def refresh_prices(session, max_age=PRICE_CACHE_MAX_AGE):
+    """
+    Önbellek max_age'den eskiyse tek toplu ticker çağrısıyla yeniler ve fiyat dict'ini döndürür.
+    Aynı anda yenilemek isteyen thread'ler tek çağrıyı paylaşır.
+    """
+    global _prices, _updated_at
+
+    if time.time() - _updated_at < max_age:
+        return _prices
+
+    with _refresh_lock:
+        if time.time() - _updated_at < max_age:
+            return _prices
+        response = session.get_tickers(category="linear")
+        if not response or response.get('retCode') != 0:
+            raise RuntimeError(f"Ticker listesi alınamadı: {response}")
+        prices = {}
+        for ticker in response.get('result', {}).get('list', []):
+            last_price = float(ticker.get('lastPrice') or 0)
+            if last_price > 0:
+                prices[ticker.get('symbol')] = last_price
+        _prices, _updated_at = prices, time.time()
+    return _prices
+
+
+def get_price(symbol):
+    return _prices.get(symbol)
+
+
+def cache_age():
+    return time.time() - _updated_at if _updated_at else None
@@ -0,0 +1,280 @@
+import os
+import sys
+import tempfile
+import time
+
+import bybit_resilience
+import bybit_simulator
+import execution_lanes
+import order_lifecycle
+import position_history
+import stop_manager
+import symbol_index
+
+# === Simülatör Senaryoları ===
+# Ağ ve API anahtarı olmadan, senaryolu fiyat akışıyla tekrarlanabilir regresyon koşusu:
+#   python simulator_scenarios.py
+# Her senaryo kendi BybitSimulator'ını kurar; fiyatlar set_price/step_prices ile elle ilerletilir.
+# Bir kontrol başarısız olursa çıkış kodu 1'dir.
+
+_failures = []
+
+
+def _check(condition, message):
+    print(f"   {'✅' if condition else '❌'} {message}")
+    if not condition:
+        _failures.append(message)
+
+
+def _new_simulator(**kwargs):
+    simulator = bybit_simulator.BybitSimulator(feed_volatility=0, **kwargs)
+    return simulator, bybit_simulator.SimulatedHTTP(simulator)
+
+
+def scenario_limit_fill_and_timeout():
+    print("🧪 Limit emir: dolum, piyasanın altındaki emir, zaman aşımı, kısmi dolum")
+    simulator, session = _new_simulator()
+    fills = []
+
+    def on_fill(record, fill_price, exec_qty):
+        fills.append((record["symbol"], fill_price, exec_qty))
+
+    # Piyasanın altında bekleyen alış emri kayma sayılmamalı
+    resting = simulator.place_order(symbol="BTCUSDT", side="Buy", orderType="Limit", qty="0.01", price="59000")
+    resting_id = resting["result"]["orderId"]
+    order_lifecycle.track_order(resting_id, "BTCUSDT", "Buy", "0.01", 59000, 0.1, reference_price=60000)
+    order_lifecycle.run_lifecycle_pass(session, on_fill, prices={"BTCUSDT": 60000})
+    _check(simulator.orders[resting_id]["price"] == "59000" and simulator.orders[resting_id]["orderStatus"] == "New",
+           "piyasanın altındaki alış emri yeniden fiyatlanmadı")
+
+    # Piyasa emrin aleyhine kaçınca yeni fiyat piyasaya değmez ve sinyal fiyatından uzaklaşma sınırlıdır
+    order_lifecycle.run_lifecycle_pass(session, on_fill, prices={"BTCUSDT": 60600})
+    amended_price = float(simulator.orders[resting_id]["price"])
+    _check(59000 < amended_price < 60600 and simulator.orders[resting_id]["orderStatus"] == "New",
+           f"kayan emir piyasanın altında yeniden fiyatlandı ({amended_price})")
+
+    # Fiyat emre gelince dolum ve on_fill
+    simulator.set_price("BTCUSDT", amended_price)
+    order_lifecycle.run_lifecycle_pass(session, on_fill, prices={"BTCUSDT": amended_price})
+    _check(fills and fills[-1][0] == "BTCUSDT", "dolan emir için on_fill çağrıldı")
+
+    # Kısmen dolup zaman aşımıyla iptal edilen emir dolum sayılır
+    partial = simulator.place_order(symbol="ETHUSDT", side="Sell", orderType="Limit", qty="1", price="3050")
+    partial_id = partial["result"]["orderId"]
+    order_lifecycle.track_order(partial_id, "ETHUSDT", "Sell", "1", 3050, 0.01, reference_price=3000)
+    simulator.partial_fill(partial_id, 0.4)
+
+    # Hiç dolmayan emir zaman aşımıyla iptal edilir
+    stale = simulator.place_order(symbol="SOLUSDT", side="Buy", orderType="Limit", qty="1", price="140")
+    stale_id = stale["result"]["orderId"]
+    order_lifecycle.track_order(stale_id, "SOLUSDT", "Buy", "1", 140, 0.01, reference_price=150)
+
+    timeout = order_lifecycle.LIMIT_ORDER_TIMEOUT
+    order_lifecycle.LIMIT_ORDER_TIMEOUT = 0
+    try:
+        prices = {"ETHUSDT": 3000, "SOLUSDT": 150}
+        order_lifecycle.run_lifecycle_pass(session, on_fill, prices=prices)
+        order_lifecycle.run_lifecycle_pass(session, on_fill, prices=prices)
+    finally:
+        order_lifecycle.LIMIT_ORDER_TIMEOUT = timeout
+
+    stats = order_lifecycle.lifecycle_snapshot()
+    _check(simulator.orders[stale_id]["orderStatus"] == "Cancelled" and stats["cancelled_timeout"] >= 1,
+           "dolmayan emir zaman aşımıyla iptal edildi")
+    _check(("ETHUSDT", 3050.0, 0.4) in fills and stats["partially_filled"] >= 1,
+           "kısmen dolup iptal edilen emir dolum sayıldı")
+    _check(not order_lifecycle.has_working_orders(), "takipte emir kalmadı")
+
+
+def scenario_breaker_trip_and_recovery():
+    print("🧪 Devre kesici: açılma, koruyucu kuyruk, toparlanma")
+    simulator, _ = _new_simulator(error_profile={"get_positions": {"rate": 1.0, "kind": "failed"},
+                                                 "set_trading_stop": {"rate": 1.0, "kind": "failed"}})
+    simulator.place_order(symbol="BTCUSDT", side="Buy", orderType="Market", qty="0.01")
+    session = bybit_resilience.ResilientSession(lambda timeout: bybit_simulator.SimulatedHTTP(simulator, timeout))
+    positions_breaker = bybit_resilience.get_breaker("get_positions")
+    stop_breaker = bybit_resilience.get_breaker("set_trading_stop")
+    positions_breaker.reset_timeout = stop_breaker.reset_timeout = 0.2
+
+    for _ in range(bybit_resilience.BREAKER_FAILURE_THRESHOLD):
+        try:
+            session.get_positions(category="linear", symbol="BTCUSDT")
+        except bybit_resilience.CircuitOpenError:
+            break
+        except Exception:
+            pass
+    _check(positions_breaker.state == bybit_resilience.STATE_OPEN, "art arda hatalarda breaker açıldı")
+
+    calls_before = simulator.call_counts.get("get_positions", 0)
+    try:
+        session.get_positions(category="linear", symbol="BTCUSDT")
+        rejected = False
+    except bybit_resilience.CircuitOpenError:
+        rejected = True
+    _check(rejected and simulator.call_counts.get("get_positions", 0) == calls_before,
+           "açık breaker çağrıyı Bybit'e gitmeden reddetti")
+
+    for _ in range(bybit_resilience.BREAKER_FAILURE_THRESHOLD + 1):
+        try:
+            session.set_trading_stop(category="linear", symbol="BTCUSDT", stopLoss="59000.0", tpslMode="Full")
+        except Exception:
+            pass
+    queued = bybit_resilience.resilience_snapshot()["protective_queue"]
+    _check("set_trading_stop:BTCUSDT" in queued, "başarısız SL işlemi koruyucu kuyruğa alındı")
+
+    simulator.error_profile = {}
+    time.sleep(0.25)
+    response = session.get_positions(category="linear", symbol="BTCUSDT")
+    _check(response["retCode"] == 0 and positions_breaker.state == bybit_resilience.STATE_CLOSED,
+           "half-open deneme başarılı oldu, breaker kapandı")
+    sent = session.drain_protective_queue()
+    _check(sent == 1 and simulator.positions["BTCUSDT"]["stopLoss"] == "59000.0",
+           "kuyruktaki SL toparlanmadan sonra uygulandı")
+
+
+def scenario_trailing_stop():
+    print("🧪 Trailing stop: senaryolu fiyatla SL takibi")
+    simulator, session = _new_simulator(price_script={"BTCUSDT": [60000, 60300, 60700, 61200, 61000, 61500]})
+    symbol_index.refresh_symbol_index(session)
+    simulator.place_order(symbol="BTCUSDT", side="Buy", orderType="Market", qty="0.01")
+    simulator.set_trading_stop(symbol="BTCUSDT", stopLoss="59100.0")
+    rule = dict(stop_manager.DEFAULT_STOP_RULE, mode="trail", trail_activation_pct=0.5, trail_pct=1.0)
+
+    min_interval = stop_manager.STOP_UPDATE_MIN_INTERVAL
+    stop_manager.STOP_UPDATE_MIN_INTERVAL = 0
+    applied = []
+    levels = []
+    try:
+        for _ in range(5):
+            prices = simulator.step_prices()
+            positions = simulator.get_positions(symbol="BTCUSDT")["result"]["list"]
+            stop_manager.sync_positions(positions, {"BTCUSDT": rule})
+            stop_manager.evaluate(prices)
+            stop_manager.flush(session, on_update=lambda symbol, level: applied.append(level))
+            levels.append(float(simulator.positions["BTCUSDT"]["stopLoss"]))
+    finally:
+        stop_manager.STOP_UPDATE_MIN_INTERVAL = min_interval
+
+    tick = float(simulator.instruments["BTCUSDT"]["tickSize"])
+    _check(len(applied) >= 2, f"SL fiyatla birlikte taşındı ({applied})")
+    _check(all(later >= earlier for earlier, later in zip(levels, levels[1:])), "SL hiç gevşemedi")
+    _check(all(abs(level / tick - round(level / tick)) < 1e-6 for level in applied), "gönderilen seviyeler tick katı")
+    _check(levels[-1] == applied[-1] and applied[-1] >= 61500 * 0.99,
+           f"son SL zirvenin %1 gerisinde ({levels[-1]})")
+
+
+def scenario_symbol_multiplier():
+    print("🧪 Sembol indeksi: çarpanlı kontrat takma adı")
+    _, session = _new_simulator()
+    symbol_index.refresh_symbol_index(session)
+    _check(symbol_index.resolve_symbol_with_multiplier("BYBIT:PEPEUSDT.P") == ("1000PEPEUSDT", 1000),
+           "taban ticker çarpanıyla çözüldü")
+    _check(symbol_index.resolve_symbol_with_multiplier("1000PEPEUSDT.P") == ("1000PEPEUSDT", 1),
+           "kontrat sembolünün çarpanı 1")
+
+
+def scenario_execution_lane_errors():
+    print("🧪 Yürütme şeridi: hata sonrası şerit kilitlenmez")
+    calls = []
+
+    def failing_provider(symbol):
+        calls.append(symbol)
+        if len(calls) == 1:
+            raise RuntimeError("provider hatası")
+        return None
+
+    # Yön sağlayıcısı sadece reject/reverse politikalarında çağrılır
+    policy = execution_lanes.EXECUTION_CONFLICT_POLICY
+    execution_lanes.EXECUTION_CONFLICT_POLICY = "reject"
+    execution_lanes.set_position_side_provider(failing_provider)
+    try:
+        first = execution_lanes.submit("SIMUSDT", "Buy", lambda conflict: ({"status": "ok"}, 200))
+        _check(first.result(timeout=2)[1] == 500, "hata veren iş 500 ile sonuçlandı")
+        second = execution_lanes.submit("SIMUSDT", "Buy", lambda conflict: ({"status": "ok"}, 200))
+        _check(second.result(timeout=2)[1] == 200, "sonraki sinyal aynı şeritte çalıştı")
+        time.sleep(0.05)
+        _check(not execution_lanes.is_busy("SIMUSDT"), "şerit boşalınca silindi")
+    finally:
+        execution_lanes.set_position_side_provider(None)
+        execution_lanes.EXECUTION_CONFLICT_POLICY = policy
+
+
+def _history_position(symbol, side, size, mark_price, stop_loss=""):
+    return {"symbol": symbol, "side": side, "size": str(size), "avgPrice": str(mark_price),
+            "markPrice": str(mark_price), "unrealisedPnl": "0", "stopLoss": stop_loss, "takeProfit": ""}
+
+
+def scenario_position_history():
+    print("🧪 Pozisyon geçmişi: halka taşması, sorgu, diske yazma")
+    capacity = position_history.HISTORY_CAPACITY
+    position_history.reset(capacity=8)
+    try:
+        # 6 görüntü x 2 açık pozisyon = 12 satır; kapasite 8 olduğu için ilk 2 görüntü üzerine yazılır
+        for second in range(6):
+            position_history.record_snapshot([
+                _history_position("BTCUSDT", "Buy", 0.01, 60000 + second, stop_loss="59000"),
+                _history_position("ETHUSDT", "Sell", 1, 3000 - second),
+                _history_position("SOLUSDT", "", 0, 150),
+            ], ts=1000 + second)
+
+        rows = position_history.query()
+        _check(len(rows["ts"]) == 8 and rows["ts"][0] == 1002 and rows["ts"][-1] == 1005,
+               f"halka en eski satırların üzerine yazdı ({rows['ts']})")
+        latest = position_history.latest_snapshot()
+        _check(latest["ts"] == 1005 and latest["positions_count"] == 3
+               and [(row["symbol"], row["side"], row["stop_loss"]) for row in latest["positions"]]
+               == [("BTCUSDT", "Buy", 59000.0), ("ETHUSDT", "Sell", None)],
+               "son görüntü sadece açık pozisyonları döndürdü")
+
+        ranged = position_history.query(symbol="BTCUSDT", start=1003, end=1004)
+        _check(ranged["ts"] == [1003, 1004] and ranged["mark_price"] == [60003, 60004], "start/end aralığı")
+        stepped = position_history.query(step=2)
+        _check(stepped["ts"] == [1003, 1003, 1005, 1005] and stepped["symbol"] == ["BTCUSDT", "ETHUSDT"] * 2,
+               f"step her aralığın son satırını döndürdü ({stepped['ts']})")
+        _check(position_history.query(limit=3)["ts"] == [1004, 1005, 1005], "limit en yeni satırları döndürdü")
+        _check(len(position_history.query(step=1e-300)["ts"]) == 8, "çok küçük step taşmadan sorgulandı")
+
+        with tempfile.TemporaryDirectory() as directory:
+            written = position_history.flush_to_disk(directory)
+            position_history.record_snapshot([_history_position("BTCUSDT", "Buy", 0.02, 60100)], ts=1006)
+            written_again = position_history.flush_to_disk(directory)
+            _check((written, written_again, position_history.flush_to_disk(directory)) == (8, 1, 0),
+                   "sadece diske yazılmamış satırlar eklendi")
+            blocks = list(position_history.read_history_file(os.path.join(directory, "positions-19700101.bin")))
+        _check(len(blocks) == 2 and list(blocks[0]["ts"]) == rows["ts"] and blocks[0]["symbol"] == rows["symbol"]
+               and blocks[0]["side"] == rows["side"] and list(blocks[1]["size"]) == [0.02],
+               "diskteki bloklar bellekteki satırlarla aynı")
+
+        # Kapasiteden büyük tek görüntü: son görüntünün baştaki satırları da üzerine yazılır
+        position_history.record_snapshot([_history_position(f"SYM{index}USDT", "Buy", 1, 10 + index)
+                                          for index in range(10)], ts=1007)
+        latest = position_history.latest_snapshot()
+        _check(latest["positions_count"] == 10
+               and [row["symbol"] for row in latest["positions"]] == [f"SYM{index}USDT" for index in range(2, 10)],
+               "üzerine yazılan görüntüden sadece bellekte kalan satırlar döndü")
+    finally:
+        position_history.reset(capacity=capacity)
+
+
+SCENARIOS = (
+    scenario_limit_fill_and_timeout,
+    scenario_breaker_trip_and_recovery,
+    scenario_trailing_stop,
+    scenario_symbol_multiplier,
+    scenario_execution_lane_errors,
+    scenario_position_history,
+)
+
+
+if __name__ == "__main__":
+    started_at = time.time()
+    for scenario in SCENARIOS:
+        try:
+            scenario()
+        except Exception as e:
+            _check(False, f"{scenario.__name__} hata verdi: {e}")
+    print(f"⏱️ {len(SCENARIOS)} senaryo {time.time() - started_at:.1f} sn")
+    if _failures:
+        print(f"❌ {len(_failures)} kontrol başarısız")
+        sys.exit(1)
+    print("✅ Tüm senaryolar geçti")
@@ -0,0 +1,299 @@
+import decimal
+import math
+import os
+import threading
+import time
+
+import price_cache
+import symbol_index
+from bybit_resilience import CircuitOpenError
+
+# === Trailing Stop ve Break-Even Motoru ===
+# Açık pozisyonların SL seviyesini pozisyon kuralına göre (position_data[symbol]['stop_rule'])
+# break-even'a taşır veya fiyatı takip ettirir. Fiyatlar paylaşılan toplu ticker önbelleğinden
+# okunur (sembol başına istek yok). Güncellemeler birleştirilir (sembol başına son seviye kazanır),
+# sadece seviye en az bir tick iyileşince ve sembol/global hız limitlerine uyarak gönderilir.
+
+STOP_MODES = ("none", "breakeven", "trail", "breakeven_trail")
+DEFAULT_STOP_RULE = {
+    "mode": os.getenv("STOP_RULE_MODE", "none").lower(),  # Varsayılan: sinyal istemedikçe SL sabit kalır
+    "breakeven_trigger_pct": float(os.getenv("STOP_BREAKEVEN_TRIGGER_PCT", "1.0")),  # %1 kârda SL girişe taşınır
+    "breakeven_offset_pct": float(os.getenv("STOP_BREAKEVEN_OFFSET_PCT", "0.1")),  # Girişin %0.1 kâr tarafı (komisyon payı)
+    "trail_activation_pct": float(os.getenv("STOP_TRAIL_ACTIVATION_PCT", "1.0")),  # %1 kârdan sonra takip başlar
+    "trail_pct": float(os.getenv("STOP_TRAIL_PCT", "1.0")),  # Zirve/dipten %1 geride takip
+}
+
+STOP_ENGINE_INTERVAL = float(os.getenv("STOP_ENGINE_INTERVAL", "2"))  # saniye
+STOP_UPDATE_MIN_INTERVAL = float(os.getenv("STOP_UPDATE_MIN_INTERVAL", "5"))  # Aynı sembol için en sık güncelleme
+STOP_UPDATES_PER_SECOND = float(os.getenv("STOP_UPDATES_PER_SECOND", "5"))  # Tüm semboller için set_trading_stop hız limiti
+DEFAULT_TICK_SIZE = 0.000001
+
+_tracked = {}  # symbol -> {side, avg_price, stop_loss, peak, rule, tick_size}
+_pending = {}  # symbol -> gönderilecek SL seviyesi (birleştirilmiş, en yeni seviye)
+_last_sent = {}  # symbol -> son gönderim zamanı
+_lock = threading.Lock()
+_rate_tokens = STOP_UPDATES_PER_SECOND
+_rate_updated_at = time.time()
+_stats = {"evaluations": 0, "queued": 0, "coalesced": 0, "sent": 0, "failed": 0, "throttled": 0}
+
+
+def build_stop_rule(signal):
+    """
+    Sinyaldeki opsiyonel alanlardan (stopMode, breakevenPct, trailPct, trailActivationPct) pozisyon kuralı üretir.
+    """
+    rule = dict(DEFAULT_STOP_RULE)
+    mode = str(signal.get("stopMode", rule["mode"])).lower()
+    rule["mode"] = mode if mode in STOP_MODES else "none"
+    for key, field in (("breakeven_trigger_pct", "breakevenPct"), ("trail_pct", "trailPct"),
+                       ("trail_activation_pct", "trailActivationPct")):
+        if signal.get(field) is not None:
+            try:
+                rule[key] = float(signal[field])
+            except (TypeError, ValueError):
+                pass
+    return rule
+
+
+def _tick_size_for(symbol):
+    instrument = symbol_index.get_instrument(symbol)
+    try:
+        return float(instrument['priceFilter']['tickSize'])
+    except (TypeError, KeyError, ValueError):
+        return DEFAULT_TICK_SIZE
+
+
+def _round_to_tick(value, tick_size, is_long):
+    # Long için yukarı, short için aşağı yuvarla: SL hiçbir zaman hesaplanandan gevşek olmaz
+    steps = value / tick_size
+    steps = math.ceil(steps - 1e-9) if is_long else math.floor(steps + 1e-9)
+    # Decimal ile çarp: float çarpımı 60695.100000000006 gibi tick katı olmayan değer üretebilir
+    return float(decimal.Decimal(steps) * decimal.Decimal(str(tick_size)))
+
+
+def sync_positions(positions, rules, partial=False):
+    """
+    Pozisyon takip döngüsünden gelen get_positions listesiyle takip edilen pozisyonları günceller.
+    rules: symbol -> stop_rule (position_data'dan). Kuralı olmayanlar için DEFAULT_STOP_RULE kullanılır.
+    partial=True ise liste tüm pozisyonları içermez (tek sembol), listede olmayanlar takipten çıkarılmaz.
+    """
+    open_symbols = set()
+    with _lock:
+        for position in positions:
+            symbol = position.get('symbol')
+            size = float(position.get('size', 0) or 0)
+            avg_price = float(position.get('avgPrice', 0) or 0)
+            rule = rules.get(symbol) or DEFAULT_STOP_RULE
+            if size <= 0 or avg_price <= 0 or rule["mode"] == "none":
+                continue
+            open_symbols.add(symbol)
+
+            side = position.get('side')
+            exchange_stop = float(position.get('stopLoss') or 0) or None
+            tracked = _tracked.get(symbol)
+            if tracked is None or tracked["side"] != side or tracked["avg_price"] != avg_price:
+                # Yeni pozisyon veya ortalama fiyat değişti: zirve/dip ortalamadan başlar
+                tracked = {"side": side, "avg_price": avg_price, "stop_loss": exchange_stop, "peak": avg_price,
+                           "tick_size": _tick_size_for(symbol)}
+                _tracked[symbol] = tracked
+            elif exchange_stop is not None:
+                # Borsadaki ve bizim gönderdiğimiz seviyeden sıkı olanı geçerli
+                current = tracked["stop_loss"]
+                if current is None:
+                    tracked["stop_loss"] = exchange_stop
+                else:
+                    tracked["stop_loss"] = max(current, exchange_stop) if side == "Buy" else min(current, exchange_stop)
+            tracked["rule"] = rule
+
+        if partial:
+            return
+        for symbol in [symbol for symbol in _tracked if symbol not in open_symbols]:
+            del _tracked[symbol]
+            _pending.pop(symbol, None)
+            _last_sent.pop(symbol, None)
+
+
+def _target_stop(tracked, price):
+    rule = tracked["rule"]
+    avg_price = tracked["avg_price"]
+    is_long = tracked["side"] == "Buy"
+    direction = 1 if is_long else -1
+    profit_pct = (price - avg_price) / avg_price * 100 * direction
+    candidates = []
+
+    if rule["mode"] in ("breakeven", "breakeven_trail") and profit_pct >= rule["breakeven_trigger_pct"]:
+        candidates.append(avg_price * (1 + direction * rule["breakeven_offset_pct"] / 100))
+
+    if rule["mode"] in ("trail", "breakeven_trail") and profit_pct >= rule["trail_activation_pct"]:
+        candidates.append(tracked["peak"] * (1 - direction * rule["trail_pct"] / 100))
+
+    if not candidates:
+        return None
+    target = max(candidates) if is_long else min(candidates)
+    return _round_to_tick(target, tracked["tick_size"], is_long)
+
+
+def evaluate(prices):
+    """
+    Tüm takip edilen pozisyonlar için hedef SL'yi hesaplar; en az bir tick iyileşme varsa kuyruğa alır.
+    """
+    with _lock:
+        for symbol, tracked in _tracked.items():
+            price = prices.get(symbol)
+            if not price:
+                continue
+            _stats["evaluations"] += 1
+            if tracked["tick_size"] == DEFAULT_TICK_SIZE:
+                # Takip başladığında sembol indeksi hazır değildiyse gerçek tick size'ı tekrar dene
+                tracked["tick_size"] = _tick_size_for(symbol)
+            is_long = tracked["side"] == "Buy"
+            tracked["peak"] = max(tracked["peak"], price) if is_long else min(tracked["peak"], price)
+
+            target = _target_stop(tracked, price)
+            if target is None:
+                continue
+            tick_size = tracked["tick_size"]
+            # SL mevcut fiyatın en az bir tick gerisinde olmalı, yoksa borsa reddeder
+            if (is_long and target > price - tick_size) or (not is_long and target < price + tick_size):
+                continue
+            reference = _pending.get(symbol, tracked["stop_loss"])
+            if reference is not None:
+                improvement = (target - reference) if is_long else (reference - target)
+                if improvement < tick_size - 1e-12:
+                    continue
+
+            if symbol in _pending:
+                _stats["coalesced"] += 1
+            else:
+                _stats["queued"] += 1
+            _pending[symbol] = target
+
+
+def _take_rate_tokens(max_count):
+    global _rate_tokens, _rate_updated_at
+    now = time.time()
+    _rate_tokens = min(STOP_UPDATES_PER_SECOND, _rate_tokens + (now - _rate_updated_at) * STOP_UPDATES_PER_SECOND)
+    _rate_updated_at = now
+    count = min(max_count, int(_rate_tokens))
+    _rate_tokens -= count
+    return count
+
+
+def _is_tighter(level, reference, is_long):
+    if reference is None:
+        return True
+    return level > reference if is_long else level < reference
+
+
+def record_stop_loss(symbol, level):
+    """
+    Motor dışında (ör. limit emir dolumunda) borsaya yazılan SL'yi bildirir. Takip edilen seviye
+    daha sıkı olanla güncellenir; ondan gevşek bekleyen güncelleme gönderilmez.
+    """
+    with _lock:
+        tracked = _tracked.get(symbol)
+        if tracked is None:
+            return
+        is_long = tracked["side"] == "Buy"
+        if _is_tighter(level, tracked["stop_loss"], is_long):
+            tracked["stop_loss"] = level
+        pending = _pending.get(symbol)
+        if pending is not None and not _is_tighter(pending, tracked["stop_loss"], is_long):
+            del _pending[symbol]
+
+
+def _send(session, symbol, level, on_update):
+    """
+    Tek sembolün SL güncellemesini gönderir. Breaker açıksa CircuitOpenError fırlatır
+    (seviye dayanıklılık katmanının koruyucu kuyruğuna alınmıştır).
+    """
+    with _lock:
+        tracked = _tracked.get(symbol)
+        # Gönderim sırası gelene kadar pozisyon kapandıysa veya daha sıkı bir SL yazıldıysa gönderme
+        if tracked is None or not _is_tighter(level, tracked["stop_loss"], tracked["side"] == "Buy"):
+            _stats["coalesced"] += 1
+            return
+
+    try:
+        response = session.set_trading_stop(
+            category="linear",
+            symbol=symbol,
+            stopLoss=str(level),
+            slOrderType="Market",
+            tpslMode="Full"
+        )
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        print(f"❌ {symbol} SL güncellemesi başarısız ({level}): {e}")
+        with _lock:
+            _stats["failed"] += 1
+            _last_sent[symbol] = time.time()
+        return
+
+    success = bool(response) and response.get('retCode') == 0
+    with _lock:
+        _last_sent[symbol] = time.time()
+        if success:
+            _stats["sent"] += 1
+            if symbol in _tracked:
+                _tracked[symbol]["stop_loss"] = level
+        else:
+            _stats["failed"] += 1
+    if not success:
+        print(f"❌ {symbol} SL güncellemesi başarısız ({level}): {response}")
+        return
+    print(f"🔒 {symbol} SL güncellendi: {level}")
+    if on_update:
+        on_update(symbol, level)
+
+
+def flush(session, on_update=None, dispatch=None):
+    """
+    Bekleyen SL güncellemelerini sembol başına tek set_trading_stop çağrısıyla gönderir.
+    Sembol bazlı minimum aralık ve global hız limiti aşılırsa güncelleme sonraki tura kalır.
+    dispatch(symbol, send) verilirse gönderim doğrudan yapılmaz, send() sembolün yürütme şeridine
+    verilir (aynı sembolün diğer SL yazımlarıyla sıralı çalışsın diye).
+    """
+    now = time.time()
+    with _lock:
+        ready = [symbol for symbol in _pending if now - _last_sent.get(symbol, 0) >= STOP_UPDATE_MIN_INTERVAL]
+        allowed = _take_rate_tokens(len(ready))
+        _stats["throttled"] += len(_pending) - allowed
+        batch = [(symbol, _pending.pop(symbol)) for symbol in ready[:allowed]]
+
+    for index, (symbol, level) in enumerate(batch):
+        if dispatch:
+            dispatch(symbol, lambda symbol=symbol, level=level: _send(session, symbol, level, on_update))
+            continue
+        try:
+            _send(session, symbol, level, on_update)
+        except CircuitOpenError:
+            # Breaker açık: bu seviye dayanıklılık katmanının koruyucu kuyruğuna alındı,
+            # denenmeyenleri bekleyenlere geri koy (daha yeni seviye varsa o kalır)
+            with _lock:
+                for remaining_symbol, remaining_level in batch[index + 1:]:
+                    _pending.setdefault(remaining_symbol, remaining_level)
+            return
+
+
+def has_tracked_positions():
+    return bool(_tracked)
+
+
+def stop_manager_snapshot():
+    with _lock:
+        return {
+            "stats": dict(_stats),
+            "tracked": {
+                symbol: {
+                    "side": tracked["side"],
+                    "avg_price": tracked["avg_price"],
+                    "stop_loss": tracked["stop_loss"],
+                    "peak": tracked["peak"],
+                    "mode": tracked["rule"]["mode"],
+                }
+                for symbol, tracked in _tracked.items()
+            },
+            "pending": dict(_pending),
+            "price_cache_age": price_cache.cache_age(),
+        }
@@ -0,0 +1,154 @@
+import threading
+import time
+
+# === Sembol Çözümleme İndeksi ===
+# Bybit'teki tüm işlem gören linear sembolleri ve bilinen takma adlarını
+# (TradingView ticker'ları, '.P' perpetual ekleri, '1000' önekli kontratlar)
+# tek bir dict içinde tutar. Sinyal geldiğinde sembol ağ çağrısı yapılmadan
+# O(1) olarak çözülür ve doğrulanır. Çarpanlı kontrata çözülen taban ticker'lar
+# (PEPEUSDT -> 1000PEPEUSDT) çarpanlarıyla birlikte tutulur; sinyal fiyatları bu çarpanla ölçeklenmelidir.
+
+SYMBOL_INDEX_REFRESH_INTERVAL = 3600  # 1 saatte bir enstrüman listesini yenile
+MULTIPLIER_PREFIXES = ("10000000", "1000000", "10000", "1000")  # Bybit'in çarpanlı kontrat önekleri (uzundan kısaya)
+
+_alias_to_symbol = {}  # takma ad -> Bybit sembolü
+_alias_multiplier = {}  # taban ticker takma adı -> kontrat çarpanı (ör. PEPEUSDT -> 1000)
+_instruments = {}  # Bybit sembolü -> enstrüman bilgisi (priceFilter, lotSizeFilter...)
+_last_refresh_time = 0
+_refresh_lock = threading.Lock()
+
+
+def normalize_symbol(raw_symbol):
+    """
+    TradingView'dan gelen sembolü indeks anahtarı biçimine getirir
+    (ör. 'BYBIT:btcusdt.p ' -> 'BTCUSDT.P'). '.P' eki indekste takma ad olarak tutulur.
+    """
+    if not raw_symbol:
+        return ""
+    symbol = str(raw_symbol).strip().upper()
+    if ":" in symbol:
+        symbol = symbol.split(":")[-1]
+    return symbol
+
+
+def _aliases_for(symbol):
+    """
+    Bir Bybit sembolü için bilinen takma adları (takma ad, fiyat çarpanı) çiftleri olarak üretir.
+    """
+    aliases = [(symbol, 1), (f"{symbol}.P", 1)]
+    for prefix in MULTIPLIER_PREFIXES:
+        # Önekten sonra harf gelmeli: 10000000AIDOGEUSDT '0AIDOGEUSDT' takma adı üretmesin
+        if symbol.startswith(prefix) and symbol[len(prefix):len(prefix) + 1].isalpha():
+            base_symbol = symbol[len(prefix):]
+            # Taban ticker'ın fiyatı kontrat fiyatının 1/çarpan'ıdır
+            aliases.append((base_symbol, int(prefix)))
+            aliases.append((f"{base_symbol}.P", int(prefix)))
+            break
+    return aliases
+
+
+def build_index(instruments):
+    """
+    Enstrüman listesinden (alias -> sembol, alias -> çarpan, sembol -> enstrüman) tablolarını kurar.
+    Gerçek semboller her zaman takma adlardan önceliklidir.
+    """
+    alias_to_symbol = {}
+    alias_multiplier = {}
+    instrument_map = {}
+
+    for instrument in instruments:
+        if instrument.get('status', 'Trading') != 'Trading':
+            continue
+        symbol = instrument.get('symbol')
+        if not symbol:
+            continue
+        instrument_map[symbol] = instrument
+
+    # Önce her gerçek sembolün kendi adı ve '.P' hali: bunları hiçbir çarpanlı takma ad ezemez
+    for symbol in instrument_map:
+        alias_to_symbol[symbol] = symbol
+        alias_to_symbol[f"{symbol}.P"] = symbol
+
+    for symbol in instrument_map:
+        for alias, multiplier in _aliases_for(symbol):
+            base_alias = alias[:-2] if alias.endswith(".P") else alias
+            # Taban ticker gerçek bir sembolse ('.P' ekli hali dahil) çarpanlı kontrata yönlendirme
+            if multiplier == 1 or base_alias in instrument_map or alias in alias_to_symbol:
+                continue
+            alias_to_symbol[alias] = symbol
+            alias_multiplier[alias] = multiplier
+
+    return alias_to_symbol, alias_multiplier, instrument_map
+
+
+def fetch_linear_instruments(session):
+    """
+    Bybit'ten tüm linear enstrümanları sayfa sayfa çeker.
+    """
+    instruments = []
+    cursor = None
+    while True:
+        params = {"category": "linear", "limit": 1000}
+        if cursor:
+            params["cursor"] = cursor
+        response = session.get_instruments_info(**params)
+        if not response or response.get('retCode') != 0:
+            raise RuntimeError(f"Enstrüman listesi alınamadı: {response}")
+        result = response.get('result', {})
+        instruments.extend(result.get('list', []))
+        cursor = result.get('nextPageCursor')
+        if not cursor:
+            break
+    return instruments
+
+
+def refresh_symbol_index(session):
+    """
+    İndeksi Bybit enstrüman listesinden yeniden kurar.
+    Yeni tablolar hazırlandıktan sonra tek atamayla değiştirilir, okuyucular kilit beklemez.
+    """
+    global _alias_to_symbol, _alias_multiplier, _instruments, _last_refresh_time
+
+    with _refresh_lock:
+        instruments = fetch_linear_instruments(session)
+        alias_to_symbol, alias_multiplier, instrument_map = build_index(instruments)
+        if not instrument_map:
+            raise RuntimeError("Enstrüman listesi boş geldi, sembol indeksi güncellenmedi.")
+        _alias_to_symbol, _alias_multiplier, _instruments = alias_to_symbol, alias_multiplier, instrument_map
+        _last_refresh_time = time.time()
+
+    print(f"📚 Sembol indeksi güncellendi: {len(instrument_map)} sembol, {len(alias_to_symbol)} takma ad")
+    return len(instrument_map)
+
+
+def is_ready():
+    return bool(_instruments)
+
+
+def is_stale():
+    return time.time() - _last_refresh_time >= SYMBOL_INDEX_REFRESH_INTERVAL
+
+
+def resolve_symbol(raw_symbol):
+    """
+    Ham sembolü Bybit sembolüne çözer. Bilinmeyen sembol için None döner.
+    """
+    return _alias_to_symbol.get(normalize_symbol(raw_symbol))
+
+
+def resolve_symbol_with_multiplier(raw_symbol):
+    """
+    Ham sembolü (Bybit sembolü, fiyat çarpanı) olarak çözer. Taban ticker çarpanlı kontrata
+    çözüldüyse (PEPEUSDT -> 1000PEPEUSDT) sinyal fiyatları çarpanla çarpılmalıdır.
+    Bilinmeyen sembol için (None, 1) döner.
+    """
+    alias = normalize_symbol(raw_symbol)
+    symbol = _alias_to_symbol.get(alias)
+    return symbol, _alias_multiplier.get(alias, 1) if symbol else 1
+
+
+def get_instrument(symbol):
+    """
+    İndekste tutulan enstrüman bilgisini döndürür (ağ çağrısı yok).
+    """
+    return _instruments.get(symbol)